@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import platform
+import tracemalloc
+import argparse
+import contextlib
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+import numpy as np
+import pygame
+import main
+
+SEED = 1234
+REPEATS = 5
+THRESHOLD = 0.20  # a case counts as a regression once it is this much slower than the baseline
+
+# each case sets up its own state from the fixed seed and returns the function that gets timed,
+# so repeats never see each other's caches
+
+opened = []  # worlds a case opened, closed before its directory is removed
+
+def open_world(directory, seed=None):
+    world = main.World(directory, seed=seed)
+    opened.append(world)
+    return world
+
+def close_worlds():
+    while opened:
+        opened.pop().close()
+
+def make_game(workdir):
+    game = main.Game(headless=True, directory=os.path.join(workdir, "world"), seed=SEED, deterministic=True)
+    game.mobs = main.MobSystem(seed=SEED)
+    opened.append(game.world)
+    return game
+
+def case_generate(workdir):
+    world = open_world(os.path.join(workdir, "world"), seed=SEED)
+    world.load()
+
+    def run():
+        for x in range(0, 40 * main.CHUNK_PIXELS, 2 * main.CHUNK_PIXELS):
+            world.stream((x, main.HEIGHT), 1000, wait=True)
+    return run
+
+def case_save_load(workdir):
+    directory = os.path.join(workdir, "world")
+    world = open_world(directory, seed=SEED)
+    world.load()
+    world.stream((500, main.HEIGHT), 8000, wait=True)
+    for chunk in world.chunks.values():
+        chunk.edit()
+        world.dirty.add((chunk.cx, chunk.cy))
+
+    def run():
+        world.save()
+        loaded = open_world(directory)
+        loaded.load()
+        loaded.stream((500, main.HEIGHT), 8000, wait=True)
+    return run
+
+def case_nearby_blocks(workdir):
+    game = make_game(workdir)
+    world = game.world
+
+    def run():
+        for chunk in world.chunks.values():
+            chunk.views = None
+        for _ in range(200):
+            world.get_nearby_blocks((500, main.HEIGHT), 1000)
+    return run
+
+def case_mobs(count):
+    def case(workdir):
+        game = make_game(workdir)
+        names = [species.name for species in main.SPECIES if species.name != "creeper"]
+        for i in range(count):
+            x = 100 + (i * 37) % 1600
+            surface = game.world.surface(x // main.TILE_SIZE)
+            species = main.SPECIES[main.SPECIES_IDS[names[i % len(names)]]]
+            game.mobs.spawn(species.name, x, surface * main.TILE_SIZE - species.size[1])
+
+        def run():
+            for _ in range(100):
+                game.mobs.update(game.world, game.player)
+        return run
+    return case
+
+def case_mining(workdir):
+    # whole ticks holding mine on a fixed list of cells: the reach raycast, block damage and
+    # the player's physics. the grass and then the dirt under it are dug out either side, nearest
+    # columns first so each target is in the open when its turn comes
+    game = make_game(workdir)
+    player_x = game.player.rect.centerx // main.TILE_SIZE
+    targets = []
+    for offset in (-1, 1, -2, 2):
+        grid_x = player_x + offset
+        surface = game.world.surface(grid_x)
+        for grid_y in (surface, surface + 1):
+            targets.append((grid_x * main.TILE_SIZE + main.TILE_SIZE // 2, grid_y * main.TILE_SIZE + 2))
+
+    def run():
+        for cursor in targets:
+            for _ in range(60):
+                game.tick(main.Inputs(mine=True, world_mouse=cursor))
+    return run
+
+def case_spawning(workdir):
+    game = make_game(workdir)
+
+    def run():
+        for i in range(1000):
+            game.spawner.update(game.world, game.mobs, game.player, game.camera, i < 500)
+    return run
+
+def case_explosions(workdir):
+    game = make_game(workdir)
+    game.player.rect.x = game.player.world_pos[0] = -5000
+
+    def run():
+        for i in range(100):
+            main.explode(game.world, game.player, (200 + (i % 20) * 150, main.HEIGHT + 400 + (i // 20) * 300), 200, 0.5)
+    return run
+
+def case_terrain_draw(workdir):
+    game = make_game(workdir)
+    screen = pygame.Surface((main.WIDTH, main.HEIGHT))
+    camera = main.Camera(main.WIDTH, main.HEIGHT)
+
+    def run():
+        game.terrain.surfaces.clear()
+        for x in range(0, 3000, 25):
+            camera.camera = pygame.Rect(x, 300, main.WIDTH, main.HEIGHT)
+            game.terrain.draw(screen, camera)
+    return run
+
+CASES = {
+    "generate": case_generate,
+    "save_load": case_save_load,
+    "nearby_blocks": case_nearby_blocks,
+    "mobs_10": case_mobs(10),
+    "mobs_100": case_mobs(100),
+    "mobs_1000": case_mobs(1000),
+    "mining": case_mining,
+    "spawning": case_spawning,
+    "explosions": case_explosions,
+    "terrain_draw": case_terrain_draw,
+}
+
+def measure(case, repeats):
+    # the game's own prints go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        return measure_case(case, repeats)
+
+def measure_case(case, repeats):
+    times = []
+    for _ in range(repeats):
+        workdir = tempfile.mkdtemp(prefix="fatalcraft-bench-")
+        try:
+            run = case(workdir)
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        finally:
+            close_worlds()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # memory is measured on a separate pass, tracemalloc would skew the timings
+    workdir = tempfile.mkdtemp(prefix="fatalcraft-bench-")
+    try:
+        run = case(workdir)
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        close_worlds()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"seconds": min(times), "median_seconds": sorted(times)[len(times) // 2], "peak_kib": peak // 1024}
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get("cases", {}).get(name)
+        if old is None:
+            print(f"{name:15} {result['seconds'] * 1000:9.2f} ms   (no baseline)")
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:15} {result['seconds'] * 1000:9.2f} ms   baseline {old['seconds'] * 1000:9.2f} ms   x{ratio:.2f} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Headless FatalCraft benchmarks")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--output", help="write the results to this JSON file, e.g. to use as a baseline")
+    parser.add_argument("--compare", help="baseline JSON to check the results against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    names = args.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    results = {name: measure(CASES[name], args.repeats) for name in names}
+    report = {
+        "seed": SEED,
+        "repeats": args.repeats,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main_cli()
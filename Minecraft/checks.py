@@ -0,0 +1,186 @@
+import os
+import sys
+import shutil
+import tempfile
+import argparse
+import contextlib
+import random
+import traceback
+from collections import deque
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+import main
+
+SEED = 1234
+
+# headless checks of game behaviour that is easy to break without noticing. each check gets a
+# scratch directory of its own and raises AssertionError when the game gets it wrong
+
+opened = []  # worlds a check opened, closed before its directory is removed
+
+def open_world(directory, seed=None):
+    world = main.World(directory, seed=seed)
+    opened.append(world)
+    return world
+
+def close_worlds():
+    while opened:
+        opened.pop().close()
+
+def make_game(workdir):
+    game = main.Game(headless=True, directory=os.path.join(workdir, "world"), seed=SEED, deterministic=True)
+    opened.append(game.world)
+    for _ in range(30):
+        # let the player land before doing anything
+        game.tick(main.Inputs())
+    return game
+
+def check_mine_reach(workdir):
+    # the exposed top of the ground a few columns away is in reach, even though the straight
+    # line to the middle of that block runs through the ground in between
+    for offset in (-4, -3, 3, 4):
+        game = make_game(os.path.join(workdir, str(offset)))
+        player = game.player
+        grid_x = player.rect.centerx // main.TILE_SIZE + offset
+        grid_y = game.world.surface(grid_x)
+        tile = game.world.get_tile(grid_x, grid_y)
+        cursor = (grid_x * main.TILE_SIZE + main.TILE_SIZE // 2, grid_y * main.TILE_SIZE + 2)
+        for _ in range(120):
+            game.tick(main.Inputs(mine=True, world_mouse=cursor))
+        assert game.world.get_tile(grid_x, grid_y) == main.AIR, \
+            f"{main.BLOCKS[tile].name} {offset} columns away was not mined"
+
+def check_mine_bedrock(workdir):
+    # moving the cursor from a half-mined block onto bedrock drops the progress bar
+    game = make_game(workdir)
+    player = game.player
+    grid_x = player.rect.centerx // main.TILE_SIZE
+    for offset, tile in ((1, None), (-1, main.BEDROCK)):
+        grid_y = game.world.surface(grid_x + offset)
+        if tile is not None:
+            game.world.set_tile(grid_x + offset, grid_y, tile)
+        cursor = ((grid_x + offset) * main.TILE_SIZE + main.TILE_SIZE // 2, grid_y * main.TILE_SIZE + 2)
+        for _ in range(10):
+            game.tick(main.Inputs(mine=True, world_mouse=cursor))
+        if tile is None:
+            assert player.mining_block is not None, "mining the ground next to the player didn't start"
+    assert player.mining_block is None and player.mining_progress == 0, "bedrock kept a stale mining progress bar"
+
+def full_light(world):
+    # the light of every loaded chunk worked out from scratch: every source at once, flooded
+    # out in one go. the chunks keep the light they had
+    lights = world.lights
+    kept = {key: chunk.light.copy() for key, chunk in world.chunks.items()}
+    for chunk in world.chunks.values():
+        chunk.light[:] = 0
+    for channel in (main.SKY, main.GLOW):
+        frontier = deque()
+        for (chunk_x, chunk_y), chunk in world.chunks.items():
+            for local_y in range(main.CHUNK_SIZE):
+                for local_x in range(main.CHUNK_SIZE):
+                    grid_x = chunk_x * main.CHUNK_SIZE + local_x
+                    grid_y = chunk_y * main.CHUNK_SIZE + local_y
+                    chunk.light[channel, local_y, local_x] = lights.source(
+                        channel, grid_x, grid_y, int(chunk.tiles[local_y, local_x]))
+                    if lights.passes(grid_x, grid_y):
+                        frontier.append((grid_x, grid_y))
+                    # unloaded neighbours shine in whatever they are guessed to hold
+                    for dx, dy in lights.NEIGHBOURS:
+                        key = ((grid_x + dx) // main.CHUNK_SIZE, (grid_y + dy) // main.CHUNK_SIZE)
+                        if key not in world.chunks and lights.level(channel, grid_x + dx, grid_y + dy):
+                            frontier.append((grid_x + dx, grid_y + dy))
+        lights.flood(channel, frontier)
+    lights.touched.clear()
+    expected = {key: chunk.light.copy() for key, chunk in world.chunks.items()}
+    for key, chunk in world.chunks.items():
+        chunk.light[:] = kept[key]
+    return expected
+
+def assert_light_matches(world, when):
+    expected = full_light(world)
+    wrong = {key: int((world.chunks[key].light != light).sum()) for key, light in expected.items()}
+    wrong = {key: count for key, count in wrong.items() if count}
+    assert not wrong, f"light {when} differs from a full recompute, cells per chunk: {wrong}"
+
+def edit_terrain(world, seed):
+    # random mining and placing around the spawn, plus a few columns dug down past the grass
+    # and dirt, so the surface of a chunk row below is deeper than the generator's
+    rng = random.Random(seed)
+    for _ in range(400):
+        grid_x, grid_y = 10 + rng.randint(-12, 12), main.SURFACE_ROW + rng.randint(-6, 14)
+        world.set_tile(grid_x, grid_y, main.AIR if rng.random() < 0.6 else main.STONE)
+    for grid_x in (20, 21, 35):
+        for grid_y in range(main.STONE_ROW + 1):
+            world.set_tile(grid_x, grid_y, main.AIR)
+
+def check_light_edits(workdir):
+    world = open_world(os.path.join(workdir, "world"), seed=SEED)
+    world.load()
+    world.stream((500, main.HEIGHT), 1000, wait=True)
+    assert_light_matches(world, "after loading")
+    edit_terrain(world, SEED)
+    assert_light_matches(world, "after edits")
+    rng = random.Random(SEED)
+    for _ in range(10):
+        world.blast((500 + rng.randint(-300, 300), main.HEIGHT + rng.randint(0, 500)), 200)
+    assert_light_matches(world, "after blasts")
+
+def check_light_reload(workdir):
+    # an edited world saved and streamed back in has to come out lit the same way
+    directory = os.path.join(workdir, "world")
+    world = open_world(directory, seed=SEED)
+    world.load()
+    world.stream((500, main.HEIGHT), 1000, wait=True)
+    edit_terrain(world, SEED)
+    world.save()
+    loaded = open_world(directory)
+    loaded.load()
+    loaded.stream((500, main.HEIGHT), 1000, wait=True)
+    assert_light_matches(loaded, "after reloading")
+
+CHECKS = {
+    "mine_reach": check_mine_reach,
+    "mine_bedrock": check_mine_bedrock,
+    "light_edits": check_light_edits,
+    "light_reload": check_light_reload,
+}
+
+def run_check(check):
+    workdir = tempfile.mkdtemp(prefix="fatalcraft-check-")
+    try:
+        # the game's own prints go to stderr so the report stays readable
+        with contextlib.redirect_stdout(sys.stderr):
+            check(workdir)
+    finally:
+        close_worlds()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Headless FatalCraft behaviour checks")
+    parser.add_argument("checks", nargs="*", help=f"checks to run (default: all of {', '.join(CHECKS)})")
+    args = parser.parse_args()
+
+    names = args.checks or list(CHECKS)
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+
+    failed = []
+    for name in names:
+        try:
+            run_check(CHECKS[name])
+        except AssertionError:
+            failed.append(name)
+            print(f"{name:15} FAILED")
+            traceback.print_exc()
+        else:
+            print(f"{name:15} ok")
+    if failed:
+        print(f"{len(failed)} check(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main_cli()
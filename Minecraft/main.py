@@ -1,1451 +1,2487 @@
-import pygame
-import sys
-import time
-import random
-import pickle
-from pygame import mixer
-import time
-
-# constants
-WIDTH, HEIGHT = 1000, 800
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-SKY_BLUE = (135, 206, 235)
-MAX_FALL_DISTANCE = 1000
-BLOCK_HEALTH = 100
-DAY_COLOR = (135, 206, 235)  
-NIGHT_COLOR = (20, 20, 50)    
-is_day = True  
-
-HOTBAR_SLOTS = 9  
-SLOT_SIZE = 40    
-HOTBAR_WIDTH = HOTBAR_SLOTS * SLOT_SIZE
-HOTBAR_HEIGHT = SLOT_SIZE
-HOTBAR_MARGIN = 10  
-SELECTED_COLOR = (255, 255, 0)  
-block = 50
-
-pygame.init()
-mixer.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("FatalCraft")
-
-font = pygame.font.SysFont('Arial', 20)
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = random.randint(2, 5)
-        self.vx = random.uniform(-2, 2)
-        self.vy = random.uniform(-5, -1)
-        self.lifetime = random.randint(20, 40)
-        
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.vy += 0.1
-        self.lifetime -= 1
-        return self.lifetime > 0
-        
-    def draw(self, screen, camera):
-        pygame.draw.circle(screen, self.color, 
-                         (int(self.x - camera.camera.x), int(self.y - camera.camera.y)), 
-                         self.size)
-
-class World:
-    def __init__(self):
-        self.blocks = []
-        self.chunks = {}  
-        self.particles = []
-        
-    def add_block(self, block):
-        self.blocks.append(block)
-        chunk_x = block.rect.x // (16*50)  
-        chunk_y = block.rect.y // (16*50)
-        if (chunk_x, chunk_y) not in self.chunks:
-            self.chunks[(chunk_x, chunk_y)] = []
-        self.chunks[(chunk_x, chunk_y)].append(block)
-        
-    def get_nearby_blocks(self, position, radius):
-        nearby = []
-        chunk_radius = radius // (16*50) + 1
-        center_chunk_x = position[0] // (16*50)
-        center_chunk_y = position[1] // (16*50)
-        
-        for x in range(center_chunk_x - chunk_radius, center_chunk_x + chunk_radius + 1):
-            for y in range(center_chunk_y - chunk_radius, center_chunk_y + chunk_radius + 1):
-                if (x, y) in self.chunks:
-                    nearby.extend(self.chunks[(x, y)])
-        return nearby
-    
-    def add_particles(self, particles):
-        self.particles.extend(particles)
-    
-    def update_particles(self):
-        self.particles = [p for p in self.particles if p.update()]
-    
-    def draw_particles(self, screen, camera):
-        for particle in self.particles:
-            particle.draw(screen, camera)
-    
-    def save(self, filename="world.dat"):
-        with open(filename, 'wb') as f:
-            pickle.dump([(block.x, block.y, block.__class__.__name__) for block in self.blocks], f)
-    
-    def load(self, filename="world.dat"):
-        try:
-            with open(filename, 'rb') as f:
-                blocks_data = pickle.load(f)
-                self.blocks = []
-                self.chunks = {}
-                for x, y, block_type in blocks_data:
-                    if block_type == "Grassblock":
-                        self.add_block(Grassblock(x, y))
-                    elif block_type == "Dirtblock":
-                        self.add_block(Dirtblock(x, y))
-                    elif block_type == "Stoneblock":
-                        self.add_block(Stoneblock(x, y))
-                    elif block_type == "Wood":
-                        self.add_block(Wood(x, y))
-                    elif block_type == "Leaves":
-                        self.add_block(Leaves(x, y))
-                    elif block_type == "IronOre":
-                        self.add_block(IronOre(x, y))
-                    elif block_type == "Coal":
-                        self.add_block(Coal(x, y))
-                    elif block_type == "Diamond":
-                        self.add_block(Diamond(x, y))
-                    elif block_type == "Bedrock":
-                        self.add_block(Bedrock(x, y))
-
-        except FileNotFoundError:
-            print("No saved world found - generating new one")
-            self.generate_world()
-    
-    def generate_world(self):
-        bedrock_depth = HEIGHT + (50 * 50)
-        for x in range(-WIDTH, WIDTH*20, 50):
-            self.add_block(Bedrock(x, bedrock_depth))
-
-        for x in range(-WIDTH, WIDTH*20, 50):
-            self.add_block(Grassblock(x, HEIGHT - 50))
-            self.add_block(Dirtblock(x, HEIGHT))
-            self.add_block(Dirtblock(x, HEIGHT + 50))
-
-            for y in range(HEIGHT + 100, HEIGHT + (50 * 50), 50):
-                depth = y - HEIGHT  
-                
-                if random.random() < 0.05:  
-                    if depth > 800 and random.random() < 0.3:
-                        self.add_block(Diamond(x, y))
-                    elif depth > 500 and random.random() < 0.5: 
-                        self.add_block(IronOre(x, y))
-                    else: 
-                        self.add_block(Coal(x, y))
-                else:
-                    self.add_block(Stoneblock(x, y))
-            
-            if x % 200 == 0 and random.random() < 0.35:
-                is_surface = True
-                for block in self.blocks:
-                    if block.rect.x == x and block.rect.y == HEIGHT - 50 and isinstance(block, Grassblock):
-                        self.generate_tree(x, HEIGHT - 100)
-                        break
-
-        
-    def generate_tree(self, x, y):
-        
-        tree = Tree(x, y, self)
-        tree.generate()
-
-class Camera:
-    def __init__(self, width, height):
-        self.camera = pygame.Rect(0, 0, width, height)
-        self.width = width
-        self.height = height
-    
-    def apply(self, entity):
-        return entity.rect.move(-self.camera.x, -self.camera.y)
-    
-    def update(self, target):
-        x = target.rect.centerx - self.width // 2
-        y = target.rect.centery - self.height // 2
-        self.camera = pygame.Rect(x, y, self.width, self.height)
-
-class Block:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.rect = pygame.Rect(x, y, 50, 50)
-        self.image = self.load_img()
-
-    def draw_health_bar(self, screen, camera):
-        if self.health < self.max_health:
-            bar_width = 50
-            health_pct = self.health / self.max_health
-            bar_x = self.rect.x - camera.camera.x
-            bar_y = self.rect.y - camera.camera.y - 10
-
-            pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, 5))
-
-            health_width = int(bar_width * health_pct)
-            health_color = (0, 255, 0) if health_pct > 0.6 else (255, 255, 0) if health_pct > 0.3 else (255, 0, 0)
-            pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, 5))
-            
-    def draw(self, screen, camera):
-        screen.blit(self.image, (self.rect.x - camera.camera.x, self.rect.y - camera.camera.y))
-
-class Grassblock(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = 50
-    
-    def load_img(self):
-        try:
-            grass_block = pygame.image.load("textures/grass.png").convert_alpha()
-            return pygame.transform.scale(grass_block, (50, 50))
-        except pygame.error as er:
-            print(f"Error loading grass block: {er}")
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((0, 255, 0))  
-            return placeholder
-
-class Dirtblock(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = 50
-    def load_img(self):
-        try:
-            dirt_block = pygame.image.load("textures/dirt.png").convert_alpha()
-            return pygame.transform.scale(dirt_block, (50, 50))
-        except pygame.error as er:
-            print(f"Error loading dirt block: {er}")
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((139, 69, 19))  
-            return placeholder
-
-class Stoneblock(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = 175
-    def load_img(self):
-        try:
-            stone_block = pygame.image.load("textures/stone.png").convert_alpha()
-            return pygame.transform.scale(stone_block, (50, 50))
-        except pygame.error as er:
-            print(f"Error loading stone block: {er}")
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((128, 128, 128))  
-            return placeholder
-
-class IronOre(Block):
-    def __init__(self,x, y):
-        super().__init__(x, y)
-        self.health = 200
-    def load_img(self):
-        try:
-            iron = pygame.image.load("textures/iron.png").convert_alpha()
-            return pygame.transform.scale(iron, (50, 50))
-        except pygame.error as er:
-            print(f"error loading iron block: {er}")
-            placeholder = pygame.surface((50, 50))
-            placeholder.fill((74, 75, 76))
-            return placeholder
-        
-class Coal(Block):
-    def __init__(self,x, y):
-        super().__init__(x, y)
-        self.health = 170
-    def load_img(self):
-        try:
-            coal = pygame.image.load("textures/coal.png").convert_alpha()
-            return pygame.transform.scale(coal, (50, 50))
-        except pygame.error as er:
-            print(f"error loading iron block: {er}")
-            placeholder = pygame.surface((50, 50))
-            placeholder.fill((54, 69, 79))
-            return placeholder
-        
-class Diamond(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = 250
-    def load_img(self):
-        try:
-            diamond = pygame.image.load("textures/diamond.png").convert_alpha()
-            return pygame.transform.scale(diamond, (50, 50))
-        except pygame.error as er:
-            print(f"error loading diamond: {er}")
-            placeholder = pygame.surface((50, 50))
-            placeholder.fill(SKY_BLUE)
-
-class Bedrock(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = float('inf')
-    def load_img(self):
-        try:
-            bedrock = pygame.image.load("textures/bedrock.png").convert_alpha()
-            return pygame.transform.scale(bedrock, (50, 50))
-        except pygame.error as er:
-            print(f"error loading bedrock: {er}")
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((0, 0, 0))
-            return placeholder
-class Wood(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = 100
-    
-    def load_img(self):
-        try:
-            wood = pygame.image.load("textures/wood.png").convert_alpha()
-            return pygame.transform.scale(wood, (50, 50))
-        except pygame.error as er:
-            print(f"Error loading wood block: {er}")
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((161, 102, 47))
-            return placeholder
-
-class Leaves(Block):
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.health = 10
-    
-    def load_img(self):
-        try:
-            leaf = pygame.image.load("textures/leaves.png").convert_alpha()
-            return pygame.transform.scale(leaf, (50, 50))
-        except pygame.error as er:
-            print(f"Error loading leaf block: {er}")
-            placeholder = pygame.Surface((50, 50))
-            placeholder.fill((74, 124, 89))
-            return placeholder
-class Tree:
-    def __init__(self, x, y, world):
-        self.x = x
-        self.y = y
-        self.world = world
-        self.height = random.randint(4, 7)
-        self.height = random.randint(4, 7)
-        if random.random() < 0.2:
-            self.height += random.randint(1, 2) 
-        
-    def generate(self):
-        for i in range(self.height):
-            self.world.add_block(Wood(self.x, self.y - (i * 50)))
-
-        leaves_width = 3  
-        leaves_start = 1  
-        
-        for layer in range(leaves_start, self.height - 1): 
-            y_pos = self.y - (layer * 50)
-
-            for i in range(-(leaves_width//2), (leaves_width//2) + 1):
-                if random.random() > 0.2:  
-                    self.world.add_block(Leaves(self.x + (i * 50), y_pos))
-
-        top_y = self.y - ((self.height - 1) * 50)
-        for i in range(-1, 2):
-            self.world.add_block(Leaves(self.x + (i * 50), top_y))
-
-        if random.random() > 0.7:
-            self.world.add_block(Leaves(self.x, top_y - 50))
-
-
-class Player:
-    def __init__(self):
-        self.world_pos = [500, HEIGHT - 200]
-        self.original_image = self.load_img()
-        self.image = self.original_image 
-        self.jump_power = -20
-        self.can_jump = True
-        self.gravity = 0
-        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], 50, 150)
-        self.on_ground = False
-        self.sprinting = False
-        self.speed = 3.317
-        self.facing_right = True
-        self.health = 20
-        self.max_health = 20
-        self.damage_frames = 0
-        self.damage_delay = 30
-        self.selected_slot = 0
-        self.inventory = {i: {"type": None, "count": 0} for i in range(9)}
-        self.mining_block = None
-        self.mining_progress = 0
-        self.mining_speed = 1  
-        self.max_mine_distance = 250
-        self.max_safe_fall = 25 
-        self.fall_damage = 0  
-        self.attack = 1
-        self.heart_size = 20 
-        self.heart_images = self.load_heart_images()
-        
-                
-    def load_img(self): 
-        try:
-            steve_img = pygame.image.load("textures/steve.png").convert_alpha()
-            return pygame.transform.scale(steve_img, (50, 150))  
-        except pygame.error as e:
-            print(f"Error loading image: {e}")
-            placeholder = pygame.Surface((50, 150))
-            placeholder.fill((255, 0, 0))  
-            return placeholder
-    def update(self, ground_blocks):
-        self.world_pos[1] += self.gravity
-        self.gravity += 0.8
-
-        self.on_ground = False
-        self.rect.x = self.world_pos[0]
-        self.rect.y = self.world_pos[1]
-
-        for block in ground_blocks:
-            if self.rect.colliderect(block.rect) and self.gravity >= 0 and self.rect.bottom > block.rect.top:
-                if self.gravity > self.max_safe_fall:
-                    self.health -= (self.gravity - self.max_safe_fall) * 0.2
-                    hurt_sound.play()
-                self.on_ground = True
-                self.can_jump = True  
-                self.gravity = 0
-                self.rect.bottom = block.rect.top
-                self.world_pos[1] = self.rect.y  
-                break
-            elif self.gravity < 0 and self.rect.top < block.rect.bottom and self.rect.colliderect(block.rect):
-                self.gravity = 0
-                self.rect.top = block.rect.bottom
-                self.world_pos[1] = self.rect.y  
-                break
-    def craft(self):
-        pass
-    def load_heart_images(self):
-        try:
-            heart_full = pygame.image.load("textures/heart_full.png").convert_alpha()
-            heart_half = pygame.image.load("textures/heart_half.png").convert_alpha()
-            heart_empty = pygame.image.load("textures/heart_empty.png").convert_alpha()
-            
-            # Scale images if needed
-            heart_full = pygame.transform.scale(heart_full, (self.heart_size, self.heart_size))
-            heart_half = pygame.transform.scale(heart_half, (self.heart_size, self.heart_size))
-            heart_empty = pygame.transform.scale(heart_empty, (self.heart_size, self.heart_size))
-            
-            return {
-                "full": heart_full,
-                "half": heart_half,
-                "empty": heart_empty
-            }
-        except:
-            print("Could not load heart images - using colored squares instead")
-            heart = pygame.Surface((self.heart_size, self.heart_size))
-            heart.fill((255, 0, 0))
-            half_heart = pygame.Surface((self.heart_size, self.heart_size))
-            half_heart.fill((255, 100, 100))
-            empty = pygame.Surface((self.heart_size, self.heart_size))
-            empty.fill((50, 50, 50))
-            return {
-                "full": heart,
-                "half": half_heart,
-                "empty": empty
-            }
-player = Player()
- 
-# passive mobs
-class Pig:
-    def __init__(self):
-        self.world_pos = [random.randint(1, 999), HEIGHT - 200]
-        self.original_img = self.load_img()
-        self.image = self.original_img
-        self.gravity = 0
-        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], (50 * 0.9) * 1.3, 59.375 * 1.3)
-        self.speed = random.uniform(1.0, 3.0)
-        self.health = 5
-        self.max_health = 5 
-        self.facing_right = random.choice([True, False]) 
-        self.max_safe_fall = 15  
-        self.knockback = 0 
-        self.knockback_resistance = 0.8  
-        self.knockback_direction = 1
-        self.on_ground = False
-        self.hit_cooldown = 0
-        self.move_direction = 1 if self.facing_right else -1
-        self.move_timer = random.randint(120, 240) 
-        self.idle_timer = 0
-        self.current_state = "wandering"  
-        self.jump_power = -15  
-        self.can_jump = True
-        self.jump_cooldown = 0
-
-    def load_img(self):
-        try:
-            pig_img = pygame.image.load("textures/legend.png").convert_alpha()
-            return pygame.transform.scale(pig_img, ((50 * 0.9) * 1.3, 59.375 * 1.3))
-        except pygame.error as er:
-            print(f"Error loading image: {er}")
-            placeholder = pygame.Surface(((50 * 0.9) * 1.3, 59.375 * 1.3))
-            placeholder.fill((255, 192, 203))  
-            return placeholder
-
-    def update(self, ground_blocks):
-        if self.knockback > 0:
-            self.world_pos[0] += self.knockback_direction * self.knockback
-            self.knockback *= self.knockback_resistance  
-            if self.knockback < 0.5:  
-                self.knockback = 0
-
-        if self.current_state == "wandering":
-            self.move_timer -= 1
-            if self.move_timer <= 0:
-                choice = random.random()
-                if choice < 0.3:  
-                    self.current_state = "idle"
-                    self.idle_timer = random.randint(60, 120)
-                elif choice < 0.6:  
-                    self.move_direction *= -1
-                    self.move_timer = random.randint(120, 240)
-                else:  
-                    self.move_timer = random.randint(60, 180)
-            
-            self.world_pos[0] += self.move_direction * self.speed
-            
-            
-        elif self.current_state == "idle":
-            self.idle_timer -= 1
-            if self.idle_timer <= 0:
-                self.current_state = "wandering"
-                self.move_timer = random.randint(120, 240)
-                self.move_direction = random.choice([self.move_direction, -self.move_direction])
-        
-
-        self.gravity = min(self.gravity + 0.8, 20)
-        self.world_pos[1] += self.gravity
-
-        self.rect.x = self.world_pos[0]
-        self.rect.y = self.world_pos[1]
-
-        self.on_ground = False
-
-        for block in ground_blocks:
-            if self.rect.colliderect(block.rect) and self.gravity >= 0 and self.rect.bottom > block.rect.top:
-                if self.gravity > self.max_safe_fall:
-                    self.health -= (self.gravity - self.max_safe_fall) * 0.2
-                self.on_ground = True
-                self.can_jump = True  
-                self.gravity = 0
-                self.rect.bottom = block.rect.top
-                self.world_pos[1] = self.rect.y  
-                break
-            elif self.gravity < 0 and self.rect.top < block.rect.bottom and self.rect.colliderect(block.rect):
-                self.gravity = 0
-                self.rect.top = block.rect.bottom
-                self.world_pos[1] = self.rect.y  
-                break
-
-        if self.move_direction > 0:
-            self.facing_right = True
-        elif self.move_direction < 0:
-            self.facing_right = False
-        self.image = pygame.transform.flip(self.original_img, not self.facing_right, False)
-
-        if self.hit_cooldown > 0:
-            self.hit_cooldown -= 1
-
-    def take_damage(self, amount):
-        self.health -= amount
-        self.knockback_direction = 1 if player.world_pos[1] < self.rect.x else -1
-        self.knockback = 15  
-        self.hit_cooldown = 10
-        self.image.fill((255, 0, 0))
-        return self.health <= 0
-
-class Sheep:
-    def __init__(self):
-        self.world_pos = [random.randint(1, 999), HEIGHT - 200]
-        self.original_img = self.load_img()
-        self.image = self.original_img
-        self.gravity = 0
-        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], (50 * 0.9) * 1.3, 59.375 * 1.3)
-        self.speed = random.uniform(1.0, 3.0)
-        self.health = 5
-        self.max_health = 5 
-        self.facing_right = random.choice([True, False]) 
-        self.max_safe_fall = 15  
-        self.knockback = 0 
-        self.knockback_resistance = 0.8  
-        self.knockback_direction = 1
-        self.on_ground = False
-        self.hit_cooldown = 0
-        self.move_direction = 1 if self.facing_right else -1
-        self.move_timer = random.randint(120, 240) 
-        self.idle_timer = 0
-        self.current_state = "wandering"  
-        self.jump_power = -15  
-        self.can_jump = True
-        self.jump_cooldown = 0
-
-    def load_img(self):
-        try:
-            sheep_img = pygame.image.load("textures/sheep.png").convert_alpha()
-            return pygame.transform.scale(sheep_img, ((50 * 0.9) * 1.3, 59.375 * 1.3))
-        except pygame.error as er:
-            print(f"Error loading image: {er}")
-            placeholder = pygame.Surface(((50 * 0.9) * 1.3, 59.375 * 1.3))
-            placeholder.fill((255, 255, 255))  
-            return placeholder
-
-    def update(self, ground_blocks):
-        if self.knockback > 0:
-            self.world_pos[0] += self.knockback_direction * self.knockback
-            self.knockback *= self.knockback_resistance  
-            if self.knockback < 0.5:  
-                self.knockback = 0
-
-        if self.current_state == "wandering":
-            self.move_timer -= 1
-            if self.move_timer <= 0:
-                choice = random.random()
-                if choice < 0.3:  
-                    self.current_state = "idle"
-                    self.idle_timer = random.randint(60, 120)
-                elif choice < 0.6:  
-                    self.move_direction *= -1
-                    self.move_timer = random.randint(120, 240)
-                else:  
-                    self.move_timer = random.randint(60, 180)
-            
-            self.world_pos[0] += self.move_direction * self.speed
-            
-            
-        elif self.current_state == "idle":
-            self.idle_timer -= 1
-            if self.idle_timer <= 0:
-                self.current_state = "wandering"
-                self.move_timer = random.randint(120, 240)
-                self.move_direction = random.choice([self.move_direction, -self.move_direction])
-        
-
-        self.gravity = min(self.gravity + 0.8, 20)
-        self.world_pos[1] += self.gravity
-
-        self.rect.x = self.world_pos[0]
-        self.rect.y = self.world_pos[1]
-
-        self.on_ground = False
-
-        for block in ground_blocks:
-            if self.rect.colliderect(block.rect) and self.gravity >= 0 and self.rect.bottom > block.rect.top:
-                if self.gravity > self.max_safe_fall:
-                    self.health -= (self.gravity - self.max_safe_fall) * 0.2
-                self.on_ground = True
-                self.can_jump = True  
-                self.gravity = 0
-                self.rect.bottom = block.rect.top
-                self.world_pos[1] = self.rect.y  
-                break
-            elif self.gravity < 0 and self.rect.top < block.rect.bottom and self.rect.colliderect(block.rect):
-                self.gravity = 0
-                self.rect.top = block.rect.bottom
-                self.world_pos[1] = self.rect.y  
-                break
-
-        if self.move_direction > 0:
-            self.facing_right = True
-        elif self.move_direction < 0:
-            self.facing_right = False
-        self.image = pygame.transform.flip(self.original_img, not self.facing_right, False)
-
-        if self.hit_cooldown > 0:
-            self.hit_cooldown -= 1
-
-    def take_damage(self, amount):
-        self.health -= amount
-        self.knockback_direction = 1 if player.world_pos[1] < self.rect.x else -1
-        self.knockback = 15  
-        self.hit_cooldown = 10
- 
-        # if self.health <= 0:
-            # return wool and mutton
-        return self.health <= 0 
-
-
-# hostile mobs
-class Zombie:
-    def __init__(self):
-        self.world_pos = [random.randint(1, 999), HEIGHT - 200]
-        self.original_img = self.load_img()
-        self.image = self.original_img
-        self.gravity = 0
-        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], 50, 150)
-        self.speed = 1.5
-        self.health = 10
-        self.max_health = 10
-        self.max_safe_fall = 25
-        self.damage = 0.01
-        self.attack_cooldown = 0
-        self.attack_delay = 1000 
-        self.facing_right = True 
-        self.knockback = 0 
-        self.knockback_resistance = 0.8  
-        self.knockback_direction = 1
-
-    def load_img(self):
-        try:
-            zombie_img = pygame.image.load("textures/zombie.png").convert_alpha()
-            return pygame.transform.scale(zombie_img, (50, 150))
-        except pygame.error as er:
-            print(f"Error loading image: {er}")
-            placeholder = pygame.Surface((50, 150))
-            placeholder.fill((0, 255, 0))  
-            return placeholder
-    def update(self, ground_blocks):
-        player_pos = player.world_pos
-        player_distance = abs(player_pos[0] - self.world_pos[0])
-        self.world_pos[1] += self.gravity
-        self.gravity += 0.8
-        self.on_ground = False
-        self.rect.x = self.world_pos[0]
-        self.rect.y = self.world_pos[1]
-        player_pos = player.world_pos
-        if self.knockback > 0:
-            self.world_pos[0] += self.knockback_direction * self.knockback
-            self.knockback *= self.knockback_resistance  
-            if self.knockback < 0.5:  
-                self.knockback = 0
-
-        if self.knockback <= 0:
-            if self.world_pos[0] < player_pos[0]:  
-                if not self.facing_right:
-                    self.facing_right = True
-                    self.image = self.original_img  
-                self.world_pos[0] += self.speed
-            else:  
-                if self.facing_right:
-                    self.facing_right = False
-                    self.image = pygame.transform.flip(self.original_img, True, False)        
-            
-            if player_distance <= 250:
-                if self.world_pos[0] < player_pos[0]:
-                    self.world_pos[0] += self.speed
-                else:
-                    self.world_pos[0] -= self.speed
-                if self.attack_cooldown > 0:
-                    self.attack_cooldown -= 1
-                if self.rect.colliderect(player.rect):
-                    player.health -= self.damage
-                    hurt_sound.play()
-                    
-                    self.attack_cooldown = self.attack_delay
-                    if self.world_pos[0] < player_pos[0]:
-                        self.world_pos[0] += self.speed
-                    else:
-                        self.world_pos[0] -= self.speed
-
-        for block in ground_blocks:
-            if self.rect.colliderect(block.rect) and self.gravity >= 0 and self.rect.bottom > block.rect.top:
-                if self.gravity > self.max_safe_fall:
-                    self.health -= (self.gravity - self.max_safe_fall) * 0.2
-                self.on_ground = True
-                self.can_jump = True  
-                self.gravity = 0
-                self.rect.bottom = block.rect.top
-                self.world_pos[1] = self.rect.y  
-                break
-            elif self.gravity < 0 and self.rect.top < block.rect.bottom and self.rect.colliderect(block.rect):
-                self.gravity = 0
-                self.rect.top = block.rect.bottom
-                self.world_pos[1] = self.rect.y  
-                break
-    
-    def take_damage(self, amount):
-        self.health -= amount
-        self.knockback_direction = 1 if player.world_pos[1] < self.rect.x else -1
-        self.knockback = 15  
-        self.hit_cooldown = 10
-        return self.health <= 0
-
-     
-class Spider:
-    def __init__(self):
-        self.world_pos = [random.randint(1, 999), HEIGHT - 200]
-        self.original_img = self.load_img()
-        self.image = self.original_img
-        self.gravity = 0
-        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], 150, 50)
-        self.speed = 1.5
-        self.health = 10
-        self.max_health = 10
-        self.max_safe_fall = 25
-        self.damage = 0.01
-        self.attack_cooldown = 0
-        self.attack_delay = 1000 
-        self.facing_right = True 
-        self.knockback = 0 
-        self.knockback_resistance = 0.8  
-        self.knockback_direction = 1
-
-    def load_img(self):
-        try:
-            spider_img = pygame.image.load("textures/spider.png").convert_alpha()
-            return pygame.transform.scale(spider_img, (150, 50))
-        except pygame.error as er:
-            print(f"Error loading image: {er}")
-            placeholder = pygame.Surface((150, 50))
-            placeholder.fill((255, 0, 0))  
-            return placeholder
-    def update(self, ground_blocks):
-        player_pos = player.world_pos
-        player_distance = abs(player_pos[0] - self.world_pos[0])
-        self.world_pos[1] += self.gravity
-        self.gravity += 0.8
-        self.on_ground = False
-        self.rect.x = self.world_pos[0]
-        self.rect.y = self.world_pos[1]
-        player_pos = player.world_pos
-        if self.knockback > 0:
-            self.world_pos[0] += self.knockback_direction * self.knockback
-            self.knockback *= self.knockback_resistance  
-            if self.knockback < 0.5:  
-                self.knockback = 0
-
-        if self.knockback <= 0:
-            if self.world_pos[0] < player_pos[0]:  
-                if not self.facing_right:
-                    self.facing_right = True
-                    self.image = self.original_img  
-                self.world_pos[0] += self.speed
-            else:  
-                if self.facing_right:
-                    self.facing_right = False
-                    self.image = pygame.transform.flip(self.original_img, True, False)
-            if player_distance <= 250:        
-                if self.world_pos[0] < player_pos[0]:
-                    self.world_pos[0] += self.speed
-                else:
-                    self.world_pos[0] -= self.speed
-                if self.attack_cooldown > 0:
-                    self.attack_cooldown -= 1
-                if self.rect.colliderect(player.rect):
-                    player.health -= self.damage
-                    hurt_sound.play()
-                    self.attack_cooldown = self.attack_delay
-                    if self.world_pos[0] < player_pos[0]:
-                        self.world_pos[0] += self.speed
-                    else:
-                        self.world_pos[0] -= self.speed
-
-        for block in ground_blocks:
-            if self.rect.colliderect(block.rect) and self.gravity >= 0 and self.rect.bottom > block.rect.top:
-                if self.gravity > self.max_safe_fall:
-                    self.health -= (self.gravity - self.max_safe_fall) * 0.2
-                self.on_ground = True
-                self.can_jump = True  
-                self.gravity = 0
-                self.rect.bottom = block.rect.top
-                self.world_pos[1] = self.rect.y  
-                break
-            elif self.gravity < 0 and self.rect.top < block.rect.bottom and self.rect.colliderect(block.rect):
-                self.gravity = 0
-                self.rect.top = block.rect.bottom
-                self.world_pos[1] = self.rect.y  
-                break
-    
-    def take_damage(self, amount):
-        self.health -= amount
-        self.knockback_direction = 1 if player.world_pos[1] < self.rect.x else -1
-        self.knockback = 15  
-        self.hit_cooldown = 10
-        return self.health <= 0
-
-class Creeper:
-    def __init__(self):
-        self.world_pos = [random.randint(1, 999), HEIGHT - 200]
-        self.original_img = self.load_img()
-        self.image = self.original_img
-        self.gravity = 0
-        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], (59.375 * 1.2) * 1.5, ((50 * 0.9) * 2) * 1.5)
-        self.speed = 1.5
-        self.health = 10
-        self.max_health = 10
-        self.max_safe_fall = 25
-        self.damage = 3
-        self.attack_cooldown = 0
-        self.attack_delay = 1000 
-        self.facing_right = True 
-        self.knockback = 0 
-        self.knockback_resistance = 0.8  
-        self.knockback_direction = 1
-        self.on_ground = False
-        self.can_jump = False
-        self.explosion_radius = 200  
-        self.explosion_damage = 0.5
-        self.is_exploding = False
-        self.explosion_timer = 0
-        self.max_explosion_timer = 60 
-        
-    def load_img(self):        
-        try:
-            creeper_img = pygame.image.load("textures/creeper.png").convert_alpha()
-            return pygame.transform.scale(creeper_img, ((59.375 * 1.2) * 1.5, ((50 * 0.9) * 2) * 1.5))
-        except pygame.error as er:
-            print(f"Error loading image: {er}")
-            placeholder = pygame.Surface(((59.375 * 1.2) * 1.5, ((50 * 0.9) * 2) * 1.5))
-            placeholder.fill((0, 200, 0))  
-            return placeholder
-            
-    def explode(self, player, world) -> bool:
-        if self.health <= 0 or self.is_exploding:
-            for _ in range(30):
-                world.add_particles([Particle(
-                    self.rect.centerx + random.randint(-20, 20),
-                    self.rect.centery + random.randint(-20, 20),
-                    (0, 255, 0))
-                ])
-            
-            distance = pygame.math.Vector2(player.rect.center).distance_to(
-                pygame.math.Vector2(self.rect.center))
-            if distance < self.explosion_radius:
-                player.health -= self.explosion_damage * (1 - distance/self.explosion_radius)
-                hurt_sound.play()
-
-            blocks_nearby = world.get_nearby_blocks(self.rect.center, self.explosion_radius)
-            for block in blocks_nearby[:]:
-                if not isinstance(block, Bedrock):
-                    distance = pygame.math.Vector2(block.rect.center).distance_to(
-                        pygame.math.Vector2(self.rect.center))
-                    if distance < self.explosion_radius:
-                        world.blocks.remove(block)
-                        chunk_x = block.rect.x // (16*50)
-                        chunk_y = block.rect.y // (16*50)
-                        if (chunk_x, chunk_y) in world.chunks:
-                            world.chunks[(chunk_x, chunk_y)].remove(block)
-            
-            return True
-        return False
-        
-    def take_damage(self, amount: float, direction: int) -> bool:
-        self.health -= amount
-        self.knockback = 15
-        self.knockback_direction = direction
-        return self.health <= 0
-        
-    def update(self, ground_blocks, player, world):
-        if self.rect.colliderect(player.rect) and not self.is_exploding:
-            self.is_exploding = True
-
-        if self.is_exploding:
-            self.explosion_timer += 1
-            if self.explosion_timer > self.max_explosion_timer - 20:
-                if self.explosion_timer % 5 == 0:
-                    self.image.fill((255, 255, 255), special_flags=pygame.BLEND_ADD)
-            
-            if self.explosion_timer >= self.max_explosion_timer:
-                self.explode(player, world)
-                return False  
-
-        if not self.is_exploding:
-            self.world_pos[1] += self.gravity
-            self.gravity += 0.8
-            self.on_ground = False
-            
-        self.rect.x = self.world_pos[0]
-        self.rect.y = self.world_pos[1]
-
-        if self.knockback > 0:
-            self.world_pos[0] += self.knockback_direction * self.knockback
-            self.knockback *= self.knockback_resistance  
-            if self.knockback < 0.5:  
-                self.knockback = 0
-
-        if self.knockback <= 0 and not self.is_exploding:
-            player_pos = player.world_pos
-            if self.world_pos[0] < player_pos[0]:  
-                if not self.facing_right:
-                    self.facing_right = True
-                    self.image = self.original_img  
-                self.world_pos[0] += self.speed
-            else:  
-                if self.facing_right:
-                    self.facing_right = False
-                    self.image = pygame.transform.flip(self.original_img, True, False)        
-                self.world_pos[0] -= self.speed
-
-            if self.attack_cooldown > 0:
-                self.attack_cooldown -= 1
-
-        for block in ground_blocks:
-            if self.rect.colliderect(block.rect):
-                if self.gravity >= 0 and self.rect.bottom > block.rect.top:
-                    if self.gravity > self.max_safe_fall:
-                        self.take_damage((self.gravity - self.max_safe_fall) * 0.2, 0)
-                    
-                    self.on_ground = True
-                    self.can_jump = True  
-                    self.gravity = 0
-                    self.rect.bottom = block.rect.top
-                    self.world_pos[1] = self.rect.y  
-                    break
-                elif self.gravity < 0 and self.rect.top < block.rect.bottom:
-                    self.gravity = 0
-                    self.rect.top = block.rect.bottom
-                    self.world_pos[1] = self.rect.y  
-                    break
-        
-        return True
-        
-def draw_hotbar(screen, player):
-    hotbar_x = (WIDTH - HOTBAR_WIDTH) // 2
-    hotbar_y = HEIGHT - HOTBAR_HEIGHT - HOTBAR_MARGIN
-    
-    pygame.draw.rect(screen, (50, 50, 50), 
-                    (hotbar_x - 2, hotbar_y - 2, 
-                     HOTBAR_WIDTH + 4, HOTBAR_HEIGHT + 4))
-    pygame.draw.rect(screen, (150, 150, 150), 
-                    (hotbar_x, hotbar_y, HOTBAR_WIDTH, HOTBAR_HEIGHT))
-    
-    for slot in range(HOTBAR_SLOTS):
-        slot_x = hotbar_x + slot * SLOT_SIZE
-        slot_rect = pygame.Rect(slot_x, hotbar_y, SLOT_SIZE, SLOT_SIZE)
-        
-        pygame.draw.rect(screen, (100, 100, 100), slot_rect, 2)
-        
-        item = player.inventory[slot]
-        if item["type"]:
-            temp_block = None
-            if item["type"] == "dirt":
-                temp_block = Dirtblock(0, 0)
-            elif item["type"] == "stone":
-                temp_block = Stoneblock(0, 0)
-            elif item["type"] == "grass":
-                temp_block = Grassblock(0, 0)
-            elif item["type"] == "wood":
-                temp_block = Wood(0, 0)
-            elif item["type"] == "leaves":
-                temp_block = Leaves(0, 0)
-            elif item["type"] == "ironore":
-                temp_block = IronOre(0, 0)
-            elif item["type"] == "coal":
-                temp_block = Coal(0, 0)
-            elif item["type"] == "diamond":
-                temp_block = Diamond(0, 0)
-            
-            if temp_block:
-
-                scaled_img = pygame.transform.scale(temp_block.image, (SLOT_SIZE - 10, SLOT_SIZE - 10))
-                screen.blit(scaled_img, (slot_x + 5, hotbar_y + 5))
-            
-            font = pygame.font.SysFont(None, 20)
-            count_text = font.render(str(item["count"]), True, WHITE)
-            screen.blit(count_text, (slot_x + SLOT_SIZE - 15, hotbar_y + SLOT_SIZE - 20))
-    
-    selection_x = hotbar_x + player.selected_slot * SLOT_SIZE
-    pygame.draw.rect(screen, SELECTED_COLOR, 
-                    (selection_x - 2, hotbar_y - 2, 
-                     SLOT_SIZE + 4, SLOT_SIZE + 4), 2)
-
-def draw_health_bar(screen, player):
-    heart_size = player.heart_size
-    padding = 0.2
-    total_width = (player.max_health / 2) * (heart_size + padding)
-
-    start_x = 320
-    start_y = 725
-
-    full_hearts = int(player.health // 2)
-    half_hearts = player.health % 2 >= 1
-    empty_hearts = int((player.max_health - player.health) // 2)
-    
-    x_offset = 0
-    for _ in range(full_hearts):
-        screen.blit(player.heart_images["full"], (start_x + x_offset, start_y))
-        x_offset += heart_size + padding
-    
-    if half_hearts:
-        screen.blit(player.heart_images["half"], (start_x + x_offset, start_y))
-        x_offset += heart_size + padding
-        empty_hearts -= 1  
-    
-    for _ in range(empty_hearts):
-        screen.blit(player.heart_images["empty"], (start_x + x_offset, start_y))
-        x_offset += heart_size + padding
-
-
-zombies = []  
-spiders = []
-creepers = []  
-pigs = []
-sheeps = []
-last_spawn_time = 0
-spawn_interval = 300  
-max_spiders = random.randint(1, 4)
-max_zombies = random.randint(1, 4)
-max_pigs = random.randint(1, 4)
-max_sheeps = random.randint(1, 4)
-max_creepers = random.randint(1, 4)
-world = World()
-world.load()  
-camera = Camera(WIDTH, HEIGHT)
-try:
-    hurt_sound = mixer.Sound("sounds/hurt.mp3")
-except:
-    print("Could not load sounds")
-
-    hurt_sound = mixer.Sound(buffer=bytearray(100))
-
-running = True
-clock = pygame.time.Clock()
-
-while running:
-
-    mouse_wheel_up = False
-    mouse_wheel_down = False
-    
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            world.save()
-            running = False
-        
-        if event.type == pygame.KEYDOWN:
-            if event.key in (pygame.K_SPACE, pygame.K_UP, pygame.K_w) and player.on_ground:
-                player.gravity = player.jump_power
-                player.on_ground = False
-                player.can_jump = False
-            
-            if pygame.K_1 <= event.key <= pygame.K_9:
-                player.selected_slot = event.key - pygame.K_1
-            elif event.key == pygame.K_LEFTBRACKET:  
-                player.selected_slot = (player.selected_slot - 1) % HOTBAR_SLOTS
-            elif event.key == pygame.K_RIGHTBRACKET:  
-                player.selected_slot = (player.selected_slot + 1) % HOTBAR_SLOTS
-            
-            if event.key == pygame.K_ESCAPE:
-                world.save()
-                running = False
-        
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            world_mouse_pos = (mouse_pos[0] + camera.camera.x,
-                            mouse_pos[1] + camera.camera.y)
-            
-            for zombie in zombies[:]:
-                if zombie.rect.collidepoint(world_mouse_pos):
-                    if zombie.take_damage(player.attack): 
-                        zombies.remove(zombie)
-                    break
-            for pig in pigs[:]:
-                if pig.rect.collidepoint(world_mouse_pos):
-                    if pig.take_damage(player.attack):
-                        pigs.remove(pig)
-                    break
-            for sheep in sheeps[:]:
-                if sheep.rect.collidepoint(world_mouse_pos):
-                    if sheep.take_damage(player.attack):
-                        sheeps.remove(sheep)
-                    break
-            for spider in spiders[:]:
-                if spider.rect.collidepoint(world_mouse_pos):
-                    if spider.take_damage(player.attack):
-                        spiders.remove(spider)
-                    break
-
-
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-        player.world_pos[0] -= player.speed
-        player.image = pygame.transform.flip(player.original_image, True, False)
-        player.facing_right = False
-    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-        player.world_pos[0] += player.speed
-        player.image = player.original_image
-        player.facing_right = True
-    if (keys[pygame.K_LEFT] or keys[pygame.K_a]):
-        player.sprinting = keys[pygame.K_LSHIFT]  
-        player.speed = 6.612 if player.sprinting else 3.317
-        player.world_pos[0] -= player.speed
-        player.image = pygame.transform.flip(player.original_image, True, False)
-        player.facing_right = False
-        
-    if (keys[pygame.K_RIGHT] or keys[pygame.K_d]):
-        player.sprinting = keys[pygame.K_LSHIFT] 
-        player.speed = 6.612 if player.sprinting else 3.317
-        player.world_pos[0] += player.speed
-        player.image = player.original_image
-        player.facing_right = True
-
-
-    # void damage
-    if player.world_pos[1] > HEIGHT * 4:
-        player.damage_frames += 1
-        if player.damage_frames >= player.damage_delay:
-            player.health -= 2
-            player.damage_frames = 0
-            hurt_sound.play()
-    else:
-        player.damage_frames = 0 
-    
-    if player.health < 1:
-        screen.fill(BLACK)
-        font = pygame.font.SysFont(None, 72)
-        text = font.render("GET WRECKED LOL", True, (255, 0, 0))
-        screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
-        pygame.display.flip()
-        time.sleep(2)
-        running = False
-    if pygame.time.get_ticks() % 120000 < 60000: 
-        is_day = True
-    else:
-        is_day = False
-    current_time = pygame.time.get_ticks()
-
-    if not is_day and current_time - last_spawn_time > spawn_interval and len(zombies) < max_zombies:
-        zombies.append(Zombie())
-        last_spawn_time = current_time
-
-    if is_day and zombies:
-        zombies.clear()
-
-    if not is_day and current_time - last_spawn_time > spawn_interval and len(spiders) < max_spiders:
-        spiders.append(Spider())
-        last_spawn_time = current_time
-
-    if is_day and spiders:
-        spiders.clear()
-
-    if not is_day and current_time - last_spawn_time > spawn_interval and len(creepers) < max_creepers:
-        creepers.append(Creeper())
-        last_spawn_time = current_time
-
-    if is_day and creepers:
-        creepers.clear()
-
-    if is_day and current_time - last_spawn_time > spawn_interval and len(pigs) < max_pigs:
-        pigs.append(Pig())
-        last_spawn_time = current_time
-    
-    if not is_day and pigs:
-        pigs.clear()
-    
-    if is_day and current_time - last_spawn_time > spawn_interval and len(sheeps) < max_sheeps:
-        sheeps.append(Sheep())
-        last_spawn_time = current_time
-    
-    if not is_day and sheeps:
-        sheeps.clear()
-    
-    # mining/placing blocks
-    mouse_buttons = pygame.mouse.get_pressed()
-    mouse_pos = pygame.mouse.get_pos()
-    world_x = mouse_pos[0] + camera.camera.x
-    world_y = mouse_pos[1] + camera.camera.y
-
-    if mouse_buttons[0]:  
-        for block in nearby_blocks[:]:
-            if isinstance(block, Bedrock):
-                continue
-            block_rect = pygame.Rect(block.rect.x - camera.camera.x, 
-                                    block.rect.y - camera.camera.y,
-                                    block.rect.width, block.rect.height)
-            
-    if mouse_buttons[0]:  
-        for block in nearby_blocks[:]:
-            block_rect = pygame.Rect(block.rect.x - camera.camera.x, 
-                                    block.rect.y - camera.camera.y,
-                                    block.rect.width, block.rect.height)
-            
-            if block_rect.collidepoint(mouse_pos) and \
-            pygame.math.Vector2(block.rect.center).distance_to(pygame.math.Vector2(player.rect.center)) <= player.max_mine_distance:
-
-                if isinstance(block, Bedrock):
-                    pygame.draw.rect(screen, (255, 0, 0), 
-                                    (block_rect.x, block_rect.y - 10, 
-                                    block_rect.width, 5))
-                    break
-
-                if block != player.mining_block:
-                    player.mining_block = block
-                    player.mining_progress = 0
-                block_max_health = getattr(block, 'health', BLOCK_HEALTH)
-
-                player.mining_progress += player.mining_speed
-                progress_pct = min(player.mining_progress / block_max_health, 1.0)
-                
-
-                pygame.draw.rect(screen, (255, 255, 255), 
-                                (block_rect.x, block_rect.y - 10, 
-                                block_rect.width * progress_pct, 5))
-
-                if player.mining_progress >= block_max_health:
-                    item_type = None
-                    if isinstance(block, Dirtblock):
-                        item_type = "dirt"
-                        color = (139, 69, 19)
-                    elif isinstance(block, Stoneblock):
-                        item_type = "stone"
-                        color = (128, 128, 128)
-                    elif isinstance(block, Grassblock):
-                        item_type = "grass"
-                        color = (0, 255, 0)
-                    elif isinstance(block, Wood):
-                        item_type = "wood"
-                        color = (160, 82, 45)
-                    elif isinstance(block, Leaves):
-                        item_type = "leaves"
-                        color = (0, 200, 0)
-                    elif isinstance(block, IronOre):
-                        item_type = "ironore"
-                        color = (100, 100, 110)
-                    elif isinstance(block, Coal):
-                        item_type = "coal"
-                        color = (54, 69, 79)
-                    elif isinstance(block, Diamond):
-                        item_type = "diamond"
-                        color = SKY_BLUE
-
-                    particles = [Particle(
-                        block.rect.centerx + random.randint(-20, 20),
-                        block.rect.centery + random.randint(-20, 20),
-                        color
-                    ) for _ in range(15)]
-                    world.add_particles(particles)
-                    
-                    added = False
-                    for slot in range(HOTBAR_SLOTS):
-                        if player.inventory[slot]["type"] == item_type:
-                            player.inventory[slot]["count"] += 1
-                            added = True
-                            break
-                    
-                    if not added:
-                        for slot in range(HOTBAR_SLOTS):
-                            if player.inventory[slot]["type"] is None:
-                                player.inventory[slot]["type"] = item_type
-                                player.inventory[slot]["count"] = 1
-                                added = True
-                                break
-                    
-
-                    world.blocks.remove(block)
-                    chunk_x = block.rect.x // (16*50)
-                    chunk_y = block.rect.y // (16*50)
-                    if (chunk_x, chunk_y) in world.chunks:
-                        world.chunks[(chunk_x, chunk_y)].remove(block)
-                    
-                    
-                    player.mining_block = None
-                    player.mining_progress = 0
-                break
-        else:
-            player.mining_block = None
-            player.mining_progress = 0
-    if mouse_buttons[2]:
-        selected_item = player.inventory[player.selected_slot]
-        if selected_item["type"] and selected_item["count"] > 0:
-            grid_x = (world_x // 50) * 50
-            grid_y = (world_y // 50) * 50
-
-            occupied = False
-            temp_rect = pygame.Rect(grid_x, grid_y, 50, 50)
-            for block in nearby_blocks:
-                if block.rect.colliderect(temp_rect):
-                    occupied = True
-                    break
-
-            has_support = False
-            for dx, dy in [(0, 50), (0, -50), (50, 0), (-50, 0)]:
-                temp_rect = pygame.Rect(grid_x + dx, grid_y + dy, 50, 50)
-                for block in nearby_blocks:
-                    if block.rect.colliderect(temp_rect):
-                        has_support = True
-                        break
-                if has_support:
-                    break
-
-            if (not player.rect.colliderect(temp_rect) and not occupied and 
-                (has_support or grid_y >= HEIGHT - 50)):
-                if selected_item["type"] == "dirt":
-                    world.add_block(Dirtblock(grid_x, grid_y))
-                elif selected_item["type"] == "stone":
-                    world.add_block(Stoneblock(grid_x, grid_y))
-                elif selected_item["type"] == "grass":
-                    world.add_block(Grassblock(grid_x, grid_y))
-                elif selected_item["type"] == "wood":
-                    world.add_block(Wood(grid_x, grid_y))   
-                elif selected_item["type"] == "leaves":
-                    world.add_block(Leaves(grid_x, grid_y))   
-                elif selected_item["type"] == "ironore":
-                    world.add_block(IronOre(grid_x, grid_y))                 
-                elif selected_item["type"] == "coal":
-                    world.add_block(Coal(grid_x, grid_y)) 
-                elif selected_item["type"] == "diamond":
-                    world.add_block(Diamond(grid_x, grid_y)) 
-
-                selected_item["count"] -= 1
-                if selected_item["count"] <= 0:
-                    selected_item["type"] = None
-                
-                
-    nearby_blocks = world.get_nearby_blocks((player.rect.x, player.rect.y), 1000)
-    player.update(nearby_blocks)
-    camera.update(player)
-    world.update_particles()
-
-    screen.fill(DAY_COLOR if is_day else NIGHT_COLOR)
-
-    for block in nearby_blocks:
-        if (block.rect.right > camera.camera.left and 
-            block.rect.left < camera.camera.right and
-            block.rect.bottom > camera.camera.top and
-            block.rect.top < camera.camera.bottom):
-            block.draw(screen, camera)
-
-    world.draw_particles(screen, camera)
-
-    screen.blit(
-        player.image,
-        (player.rect.x - camera.camera.x, player.rect.y - camera.camera.y)
-    )
-    for zombie in zombies:
-        zombie.update(nearby_blocks)
-        screen.blit(zombie.image, (zombie.rect.x - camera.camera.x, zombie.rect.y - camera.camera.y))
-
-    for spider in spiders:
-        spider.update(nearby_blocks)
-        screen.blit(spider.image, (spider.rect.x - camera.camera.x, spider.rect.y - camera.camera.y))
-
-    for creeper in creepers[:]:    
-        if not creeper.update(nearby_blocks, player, world):
-            creepers.remove(creeper)
-        else:
-            screen.blit(creeper.image, (creeper.rect.x - camera.camera.x, creeper.rect.y - camera.camera.y))
-
-    for pig in pigs:
-        pig.update(nearby_blocks)
-        screen.blit(pig.image, (pig.rect.x - camera.camera.x, pig.rect.y - camera.camera.y))
-
-    for sheep in sheeps:
-        sheep.update(nearby_blocks)
-        screen.blit(sheep.image, (sheep.rect.x - camera.camera.x, sheep.rect.y - camera.camera.y))
-        
-    draw_hotbar(screen, player)
-    draw_health_bar(screen, player)
-
-    fps_text = font.render(f"FPS: {int(clock.get_fps())}", True, (255, 0, 0))
-    screen.blit(fps_text, (10, 10))
-    text = font.render(f"FATALCRAFT, ALPHA VERSION 1.1", True, (255, 255, 255))
-    screen.blit(text, (10, 30))
-    
-    if player.mining_block:
-        block_rect = pygame.Rect(
-            player.mining_block.rect.x - camera.camera.x,
-            player.mining_block.rect.y - camera.camera.y,
-            player.mining_block.rect.width,
-            player.mining_block.rect.height
-        )
-        progress_pct = min(player.mining_progress / BLOCK_HEALTH, 1.0)
-        pygame.draw.rect(screen, (255, 255, 255), 
-                        (block_rect.x, block_rect.y - 10, 
-                         block_rect.width * progress_pct, 5))
-    
-    pygame.display.flip()
-    clock.tick(60) 
-
-sys.exit(1)
+import pygame
+import os
+import sys
+import time
+import random
+import math
+import pickle
+import json
+import mmap
+import struct
+import zlib
+import hashlib
+import shutil
+import tempfile
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+import numpy as np
+from pygame import mixer
+import time
+
+# constants
+WIDTH, HEIGHT = 1000, 800
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+SKY_BLUE = (135, 206, 235)
+MAX_FALL_DISTANCE = 1000
+BLOCK_HEALTH = 100
+DAY_COLOR = (135, 206, 235)  
+NIGHT_COLOR = (20, 20, 50)    
+
+HOTBAR_SLOTS = 9  
+SLOT_SIZE = 40    
+HOTBAR_WIDTH = HOTBAR_SLOTS * SLOT_SIZE
+HOTBAR_HEIGHT = SLOT_SIZE
+HOTBAR_MARGIN = 10  
+SELECTED_COLOR = (255, 255, 0)  
+block = 50
+
+# timing: the world always advances in fixed ticks, rendering runs as fast as it can up to MAX_FPS
+TICK_RATE = 60
+TICK_SECONDS = 1 / TICK_RATE
+TICK_MS = 1000 / TICK_RATE
+MAX_FPS = 120
+MAX_FRAME_TIME = 0.25  # a longer stall is dropped rather than caught up, so the loop can't spiral
+PROFILE_FRAMES = 600  # frames of phase timings the profiler keeps
+HURT_TICKS = 12  # ticks a damaged sprite stays tinted
+
+# input recordings
+REPLAY_MAGIC = b"FCRP"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sHI")  # magic, version, length of the JSON header that follows
+REPLAY_TICK = struct.Struct("<Bbbii")  # button flags, slot, slot step, mouse world x, y
+
+# world grid
+TILE_SIZE = 50
+CHUNK_SIZE = 16
+CHUNK_PIXELS = CHUNK_SIZE * TILE_SIZE
+AIR = 0
+GRASS, DIRT, STONE, IRON_ORE, COAL, DIAMOND, BEDROCK, WOOD, LEAVES = range(1, 10)
+
+# lighting
+MAX_LIGHT = 15  # level at a light source, one less for every cell it travels
+SKY, GLOW = 0, 1  # light channels: open sky, and light given off by blocks
+# alpha of the black drawn over a cell at each light level
+LIGHT_ALPHA = (255 * (1 - 0.8 ** (MAX_LIGHT - np.arange(MAX_LIGHT + 1)))).astype(np.uint8)
+
+# world storage
+WORLD_DIR = "world"
+LEGACY_SAVE = "world.dat"
+REGION_SIZE = 32  # chunks per region side
+REGION_MAGIC = b"FCRG"
+REGION_VERSION = 2
+REGION_HEADER = struct.Struct("<4sHH")
+REGION_ENTRY = struct.Struct("<II")  # version 1 offset table entry
+REGION_DATA_START = 4096  # the header page: magic, version, size and a saved flag per chunk
+CHUNK_BYTES = CHUNK_SIZE * CHUNK_SIZE
+
+# terrain rows, in grid cells
+SURFACE_ROW = (HEIGHT - 50) // TILE_SIZE
+STONE_ROW = SURFACE_ROW + 3
+BEDROCK_ROW = (HEIGHT + 50 * 50) // TILE_SIZE
+KEEP_CHUNKS = 2  # extra ring of chunks kept in memory around the streamed area
+CHUNK_WORKERS = 2
+STREAM_BUDGET = 0.002  # seconds per frame spent handing finished chunks to the world
+PREFETCH_TICKS = 30  # chunks are requested where the player will be this many ticks from now
+
+class TextureRegistry:
+    # every texture is decoded and scaled once, then shared by everything that asks for it
+    def __init__(self, directory="textures"):
+        self.directory = directory
+        self.surfaces = {}
+        self.fallbacks = {}
+        self.version = 0
+        self.headless = False  # a headless game never shows a pixel, so nothing is decoded
+
+    def get(self, name, size=(50, 50), fallback=(255, 0, 255)):
+        key = (name, size)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.load(name, size, fallback)
+            self.surfaces[key] = surface
+            self.fallbacks[key] = fallback
+        return surface
+
+    def load(self, name, size, fallback):
+        if self.headless:
+            placeholder = pygame.Surface(size, pygame.SRCALPHA)
+            placeholder.fill(fallback)
+            return placeholder
+        try:
+            img = pygame.image.load(os.path.join(self.directory, f"{name}.png")).convert_alpha()
+            return pygame.transform.scale(img, size)
+        except (pygame.error, FileNotFoundError) as er:
+            print(f"Error loading {name} texture: {er}")
+            placeholder = pygame.Surface(size, pygame.SRCALPHA)
+            placeholder.fill(fallback)
+            return placeholder
+
+    def swap(self, directory):
+        # redraw the cached surfaces in place so blocks already holding them pick up the new pack
+        self.directory = directory
+        self.version += 1
+        for key, surface in self.surfaces.items():
+            name, size = key
+            fresh = self.load(name, size, self.fallbacks[key])
+            surface.fill((0, 0, 0, 0))
+            surface.blit(fresh, (0, 0))
+
+textures = TextureRegistry()
+
+class SpriteCache:
+    # every facing and tint variant of an entity image, made the first time it is drawn,
+    # so a frame only looks images up and never builds or recolours a surface
+    TINTS = {
+        "hurt": ((255, 90, 90), pygame.BLEND_RGB_MULT),
+        "flash": ((255, 255, 255), pygame.BLEND_RGB_ADD),
+    }
+
+    def __init__(self):
+        self.variants = {}
+        self.version = textures.version
+
+    def get(self, texture, size, color, facing_right=True, tint=None, scale=1):
+        if self.version != textures.version:
+            # a texture pack swap redrew the base images, every variant made from them is stale
+            self.variants.clear()
+            self.version = textures.version
+        key = (texture, size, facing_right, tint, scale)
+        image = self.variants.get(key)
+        if image is None:
+            image = self.build(texture, size, color, facing_right, tint, scale)
+            self.variants[key] = image
+        return image
+
+    def build(self, texture, size, color, facing_right, tint, scale):
+        if tint is not None:
+            # tints work on a copy, the base image is shared with every other user of the texture
+            image = self.get(texture, size, color, facing_right, None, scale).copy()
+            tint_color, flags = self.TINTS[tint]
+            image.fill(tint_color, special_flags=flags)
+            return image
+        image = textures.get(texture, size, color)
+        if not facing_right:
+            image = pygame.transform.flip(image, True, False)
+        if scale != 1:
+            image = pygame.transform.scale(image, (math.ceil(size[0] * scale), math.ceil(size[1] * scale)))
+        return image
+
+sprites = SpriteCache()
+
+class ParticlePool:
+    # fixed-capacity particle storage; one numpy pass moves and culls every particle,
+    # and drawing is a single blits call over pre-rendered circles
+    def __init__(self, capacity=50000, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.size = np.zeros(capacity, dtype=np.int8)
+        self.color = np.zeros(capacity, dtype=np.uint16)
+        self.palette = {}
+        self.sprites = {}
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, color, amount, spread=20):
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return
+        if color not in self.palette:
+            self.palette[color] = len(self.palette)
+        start, end = self.count, self.count + amount
+        rng = self.rng
+        self.x[start:end] = x + rng.integers(-spread, spread + 1, amount)
+        self.y[start:end] = y + rng.integers(-spread, spread + 1, amount)
+        self.vx[start:end] = rng.uniform(-2, 2, amount)
+        self.vy[start:end] = rng.uniform(-5, -1, amount)
+        self.life[start:end] = rng.integers(20, 41, amount)
+        self.size[start:end] = rng.integers(2, 6, amount)
+        self.color[start:end] = self.palette[color]
+        self.count = end
+
+    def update(self):
+        n = self.count
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += 0.1
+        self.life[:n] -= 1
+        alive = self.life[:n] > 0
+        kept = int(np.count_nonzero(alive))
+        if kept < n:
+            for array in (self.x, self.y, self.vx, self.vy, self.life, self.size, self.color):
+                array[:kept] = array[:n][alive]
+            self.count = kept
+
+    def sprite(self, color_id, size):
+        key = (color_id, size)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            colors = list(self.palette)
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, colors[color_id], (size, size), size)
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, camera):
+        # returns the area the particles cover, for the dirty-rect update
+        n = self.count
+        if n == 0:
+            return []
+        view = camera.camera
+        scale = camera.scale
+        size = self.size[:n] if scale == 1 else np.maximum(np.round(self.size[:n] * scale), 1).astype(np.int8)
+        x = ((self.x[:n] - view.x) * scale).astype(np.int32) - size
+        y = ((self.y[:n] - view.y) * scale).astype(np.int32) - size
+        width, height = screen.get_size()
+        visible = (x > -10) & (x < width) & (y > -10) & (y < height)
+        if not visible.any():
+            return []
+        x = x[visible]
+        y = y[visible]
+        sprite = self.sprite
+        screen.blits([(sprite(color, radius), (px, py)) for color, radius, px, py in zip(
+            self.color[:n][visible].tolist(), size[visible].tolist(), x.tolist(), y.tolist())], doreturn=False)
+        left, top = int(x.min()), int(y.min())
+        return [pygame.Rect(left, top, int(x.max()) - left + 12, int(y.max()) - top + 12)]
+
+CHUNK_VERSIONS = itertools.count()
+
+class Chunk:
+    # a 16x16 patch of block ids, indexed [row][column]
+    def __init__(self, cx, cy, tiles=None):
+        self.cx = cx
+        self.cy = cy
+        self.tiles = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8) if tiles is None else tiles
+        self.light = np.zeros((2, CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)  # [SKY or GLOW][row][column]
+        self.views = None
+        self.version = next(CHUNK_VERSIONS)
+
+    def edit(self):
+        # chunks streamed from a region file share its memory map until they're first changed
+        if not self.tiles.flags.writeable:
+            self.tiles = self.tiles.copy()
+        self.views = None
+        self.version = next(CHUNK_VERSIONS)
+        return self.tiles
+
+    def relit(self):
+        # the tiles are the same but the cached surface has to be shaded again
+        self.version = next(CHUNK_VERSIONS)
+
+    def blocks(self):
+        # Block objects are only built for chunks somebody asks about, and rebuilt after an edit
+        if self.views is None:
+            origin_x = self.cx * CHUNK_SIZE
+            origin_y = self.cy * CHUNK_SIZE
+            rows, cols = np.nonzero(self.tiles)
+            tiles = self.tiles[rows, cols].tolist()
+            self.views = [Block((origin_x + col) * TILE_SIZE, (origin_y + row) * TILE_SIZE, tile)
+                          for row, col, tile in zip(rows.tolist(), cols.tolist(), tiles)]
+        return self.views
+
+def read_compressed_region(path):
+    # version 1 regions: offset table plus zlib-compressed chunks, only read to upgrade them
+    entries = REGION_SIZE * REGION_SIZE
+    chunks = {}
+    with open(path, "rb") as f:
+        f.seek(REGION_HEADER.size)
+        table = np.frombuffer(f.read(REGION_ENTRY.size * entries), dtype="<u4").reshape(entries, 2)
+        for index, (offset, length) in enumerate(table.tolist()):
+            if length:
+                f.seek(offset)
+                data = zlib.decompress(f.read(length))
+                chunks[index] = np.frombuffer(data, dtype=np.uint8).reshape(CHUNK_SIZE, CHUNK_SIZE)
+    return chunks
+
+class RegionFile:
+    # fixed layout: a header page, then one uncompressed 16x16 slot per chunk at a known offset.
+    # the file is memory-mapped, so reading a chunk is a numpy view into the mapping, not a parse
+    def __init__(self, path):
+        entries = REGION_SIZE * REGION_SIZE
+        size = REGION_DATA_START + entries * CHUNK_BYTES
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                magic, version, region_size = REGION_HEADER.unpack(f.read(REGION_HEADER.size))
+            if magic != REGION_MAGIC or region_size != REGION_SIZE or version not in (1, REGION_VERSION):
+                raise ValueError(f"{path} is not a region file")
+            if version == 1:
+                # the upgraded region is written in full next to the old one and only then moved
+                # over it, so an interrupted upgrade never loses the only copy
+                temp = path + ".tmp"
+                if os.path.exists(temp):
+                    os.remove(temp)
+                upgraded = RegionFile(temp)
+                for index, tiles in read_compressed_region(path).items():
+                    upgraded.write(index, tiles)
+                upgraded.flush()
+                upgraded.close()
+                os.replace(temp, path)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(REGION_HEADER.pack(REGION_MAGIC, REGION_VERSION, REGION_SIZE))
+                f.truncate(size)
+
+        self.path = path
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.saved = np.frombuffer(self.map, dtype=np.uint8, count=entries, offset=REGION_HEADER.size)
+
+    def read(self, index):
+        if not self.saved[index]:
+            return None
+        tiles = np.frombuffer(self.map, dtype=np.uint8, count=CHUNK_BYTES,
+                              offset=REGION_DATA_START + index * CHUNK_BYTES).reshape(CHUNK_SIZE, CHUNK_SIZE)
+        # read-only so an edit copies the chunk instead of writing through to disk before a save
+        tiles.flags.writeable = False
+        return tiles
+
+    def write(self, index, tiles):
+        start = REGION_DATA_START + index * CHUNK_BYTES
+        self.map[start:start + CHUNK_BYTES] = tiles.tobytes()
+        self.saved[index] = 1
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        # the mapping refuses to close while numpy views into it are alive, so saved goes first
+        self.saved = None
+        self.map.close()
+        self.file.close()
+
+class WorldStorage:
+    # a directory holding level.dat and one region file per 32x32 chunks
+    def __init__(self, directory=WORLD_DIR):
+        self.directory = directory
+        self.regions = {}
+        self.lock = threading.Lock()  # chunks are read on the worker pool and written on the main thread
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, "level.dat"))
+
+    def read_level(self):
+        with open(os.path.join(self.directory, "level.dat")) as f:
+            return json.load(f)
+
+    def write_level(self, level):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "level.dat"), "w") as f:
+            json.dump(level, f)
+
+    def region(self, chunk_x, chunk_y, create=False):
+        key = (chunk_x // REGION_SIZE, chunk_y // REGION_SIZE)
+        region = self.regions.get(key)
+        if region is None:
+            path = os.path.join(self.directory, f"r.{key[0]}.{key[1]}.fcr")
+            if not create and not os.path.exists(path):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            region = self.regions[key] = RegionFile(path)
+        return region
+
+    def load_chunk(self, chunk_x, chunk_y):
+        with self.lock:
+            region = self.region(chunk_x, chunk_y)
+            if region is None:
+                return None
+            return region.read((chunk_y % REGION_SIZE) * REGION_SIZE + chunk_x % REGION_SIZE)
+
+    def save_chunk(self, chunk_x, chunk_y, tiles):
+        with self.lock:
+            region = self.region(chunk_x, chunk_y, create=True)
+            region.write((chunk_y % REGION_SIZE) * REGION_SIZE + chunk_x % REGION_SIZE, tiles)
+
+    def flush(self):
+        with self.lock:
+            for region in self.regions.values():
+                region.flush()
+
+    def close(self):
+        with self.lock:
+            for region in self.regions.values():
+                region.close()
+            self.regions.clear()
+
+def convert_legacy_world(path, storage, seed):
+    # turns an old whole-world pickle of (x, y, class name) tuples into region files. the pickle
+    # only held a strip of columns, and saved chunks are never generated again, so every chunk
+    # starts out generated from the seed and the columns the strip covered are replaced by
+    # what it held, air included
+    with open(path, 'rb') as f:
+        blocks_data = pickle.load(f)
+    cells = {}
+    for x, y, block_type in blocks_data:
+        block_type = BLOCK_NAMES.get(block_type)
+        if block_type is not None:
+            cells[(x // TILE_SIZE, y // TILE_SIZE)] = block_type.id
+    if cells:
+        generator = TerrainGenerator(seed)
+        columns = {grid_x for grid_x, _ in cells}
+        rows = [grid_y for _, grid_y in cells]
+        chunks = {}
+        for chunk_x in {grid_x // CHUNK_SIZE for grid_x in columns}:
+            covered = [local_x for local_x in range(CHUNK_SIZE) if chunk_x * CHUNK_SIZE + local_x in columns]
+            for chunk_y in range(min(rows) // CHUNK_SIZE, max(rows) // CHUNK_SIZE + 1):
+                tiles = chunks[(chunk_x, chunk_y)] = generator.generate_chunk(chunk_x, chunk_y)
+                tiles[:, covered] = AIR
+        for (grid_x, grid_y), tile in cells.items():
+            chunks[(grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE)][grid_y % CHUNK_SIZE, grid_x % CHUNK_SIZE] = tile
+        for (chunk_x, chunk_y), tiles in chunks.items():
+            storage.save_chunk(chunk_x, chunk_y, tiles)
+    storage.write_level({"format": REGION_VERSION, "seed": seed})
+    storage.flush()
+
+class LightEngine:
+    # sky light and block light for every loaded chunk: MAX_LIGHT at a source, one less per cell
+    # it travels through. opaque blocks are lit by their neighbours but pass nothing on. a chunk
+    # is lit with whole-array passes when it arrives; an edit only floods the cells around it
+    NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    # each neighbouring chunk: its offset, then our edge and its edge where the two touch
+    SIDES = (((0, -1), (0, slice(None)), (-1, slice(None))),
+             ((0, 1), (-1, slice(None)), (0, slice(None))),
+             ((-1, 0), (slice(None), 0), (slice(None), -1)),
+             ((1, 0), (slice(None), -1), (slice(None), 0)))
+
+    def __init__(self, world):
+        self.world = world
+        self.touched = set()  # chunks whose light changed during the current update
+
+    def source(self, channel, grid_x, grid_y, tile):
+        if channel == GLOW:
+            return BLOCK_LIGHT[tile]
+        # everything above the topmost block of a column sees the sky; where none of the column
+        # is loaded yet, the generator's surface is the best guess
+        surface = self.world.surface(grid_x)
+        if surface is None:
+            surface = int(self.world.generator.heightmap(grid_x))
+        return MAX_LIGHT if grid_y < surface else 0
+
+    def level(self, channel, grid_x, grid_y):
+        chunk = self.world.chunks.get((grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE))
+        if chunk is None:
+            # nothing is stored for empty or unloaded chunks, all they can hold is sky light
+            return self.source(channel, grid_x, grid_y, AIR)
+        return int(chunk.light[channel, grid_y % CHUNK_SIZE, grid_x % CHUNK_SIZE])
+
+    def passes(self, grid_x, grid_y):
+        return not BLOCK_OPAQUE[self.world.get_tile(grid_x, grid_y)]
+
+    def set_level(self, chunk, channel, grid_x, grid_y, level):
+        chunk.light[channel, grid_y % CHUNK_SIZE, grid_x % CHUNK_SIZE] = level
+        self.touched.add(chunk)
+
+    def sources(self, columns, rows, tiles):
+        # the light a block of cells gives off by itself, per channel; tiles is [row][column]
+        surfaces = np.array([self.world.surface(grid_x) for grid_x in columns.tolist()], dtype=float)
+        surfaces = np.where(np.isnan(surfaces), self.world.generator.heightmap(columns), surfaces)
+        return np.stack([np.where(rows[:, None] < surfaces, MAX_LIGHT, 0),
+                         np.asarray(BLOCK_LIGHT)[tiles]])
+
+    def add_chunk(self, chunk, shaded=()):
+        # a new chunk is lit with one whole-array pass per light level, padded with what its
+        # neighbours shine in. they were lit against a guess of what it held, so then its light
+        # is flooded out into them, and their edge cells that may have leant on that guess are
+        # relit, together with any cells further down the chunk now keeps from the sky
+        chunks = self.world.chunks
+        origin_x, origin_y = chunk.cx * CHUNK_SIZE, chunk.cy * CHUNK_SIZE
+        opaque = np.asarray(BLOCK_OPAQUE)[chunk.tiles]
+        grid_y, grid_x = np.indices((CHUNK_SIZE, CHUNK_SIZE)) + np.array([origin_y, origin_x])[:, None, None]
+        sources = self.sources(grid_x[0], grid_y[:, 0], chunk.tiles)
+        sides = []
+        for (dx, dy), ours, theirs in self.SIDES:
+            neighbour = chunks.get((chunk.cx + dx, chunk.cy + dy))
+            # the cells just across the edge, as a one-cell-thick block
+            columns = np.unique(grid_x[ours] + dx)
+            rows = np.unique(grid_y[ours] + dy)
+            if neighbour is None:
+                light = self.sources(columns, rows, np.zeros((len(rows), len(columns)), dtype=np.uint8))
+                light = light.reshape(2, CHUNK_SIZE)
+                sides.append((None, light, light, np.zeros(CHUNK_SIZE, dtype=bool), None))
+            else:
+                tiles = neighbour.tiles[theirs]
+                source = self.sources(columns, rows, tiles.reshape(len(rows), len(columns)))
+                sides.append((neighbour, neighbour.light[:, theirs[0], theirs[1]].astype(np.int16),
+                              source.reshape(2, CHUNK_SIZE), np.asarray(BLOCK_OPAQUE)[tiles],
+                              (grid_x[ours] + dx, grid_y[ours] + dy)))
+
+        suspects = list(shaded)
+        for channel in (SKY, GLOW):
+            # light each cell hands to its neighbours; the border holds what the neighbours hand in
+            give = np.zeros((CHUNK_SIZE + 2, CHUNK_SIZE + 2), dtype=np.int16)
+            borders = (give[0, 1:-1], give[-1, 1:-1], give[1:-1, 0], give[1:-1, -1])
+            for border, (_, across, _, blocked, _) in zip(borders, sides):
+                border[:] = np.where(blocked, 0, across[channel])
+            light = sources[channel].astype(np.int16)
+            # most chunks have nothing to spread in one channel or the other, deep ones in either
+            for _ in range(MAX_LIGHT if light.any() or give.any() else 0):
+                give[1:-1, 1:-1] = np.where(opaque, 0, light)
+                spread = np.maximum(np.maximum(give[:-2, 1:-1], give[2:, 1:-1]),
+                                    np.maximum(give[1:-1, :-2], give[1:-1, 2:])) - 1
+                lit = np.maximum(light, spread)
+                if (lit == light).all():
+                    break
+                light = lit
+            chunk.light[channel] = light
+            give[1:-1, 1:-1] = np.where(opaque, 0, light)
+
+            frontier = deque()
+            for ((dx, dy), ours, _), (neighbour, theirs, source, _, cells) in zip(self.SIDES, sides):
+                if neighbour is None:
+                    continue
+                edge = give[1:-1, 1:-1][ours]
+                brighter = np.flatnonzero(edge - 1 > theirs[channel])
+                frontier.extend(zip((cells[0][brighter] - dx).tolist(), (cells[1][brighter] - dy).tolist()))
+                leant = np.flatnonzero((theirs[channel] > 0) & (theirs[channel] != source[channel]) &
+                                       (edge <= theirs[channel]))
+                suspects += zip(cells[0][leant].tolist(), cells[1][leant].tolist())
+            self.flood(channel, frontier)
+        chunk.relit()
+        if suspects:
+            self.relight(suspects)
+        else:
+            self.finish()
+
+    def flood(self, channel, frontier):
+        # breadth-first spread from the given cells, raising every neighbour that ends up brighter
+        chunks = self.world.chunks
+        while frontier:
+            grid_x, grid_y = frontier.popleft()
+            spread = self.level(channel, grid_x, grid_y) - 1
+            if spread <= 0:
+                continue
+            for dx, dy in self.NEIGHBOURS:
+                x, y = grid_x + dx, grid_y + dy
+                chunk = chunks.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+                if chunk is None or chunk.light[channel, y % CHUNK_SIZE, x % CHUNK_SIZE] >= spread:
+                    continue
+                self.set_level(chunk, channel, x, y, spread)
+                if not BLOCK_OPAQUE[chunk.tiles[y % CHUNK_SIZE, x % CHUNK_SIZE]]:
+                    frontier.append((x, y))
+
+    def relight(self, cells):
+        # cells whose tile or view of the sky changed: first everything their old light reached
+        # is cleared, then the cleared area is filled again from its sources and its brighter edges
+        chunks = self.world.chunks
+        cells = [cell for cell in cells if (cell[0] // CHUNK_SIZE, cell[1] // CHUNK_SIZE) in chunks]
+        for channel in (SKY, GLOW):
+            cleared = list(cells)
+            darken = deque()
+            frontier = deque()
+            for grid_x, grid_y in cells:
+                level = self.level(channel, grid_x, grid_y)
+                if level:
+                    self.set_level(chunks[(grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE)], channel, grid_x, grid_y, 0)
+                    darken.append((grid_x, grid_y, level))
+            while darken:
+                grid_x, grid_y, level = darken.popleft()
+                for dx, dy in self.NEIGHBOURS:
+                    x, y = grid_x + dx, grid_y + dy
+                    chunk = chunks.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+                    neighbour = self.level(channel, x, y)
+                    if chunk is not None and 0 < neighbour < level:
+                        # lit through the cleared cell, so it is cleared too
+                        self.set_level(chunk, channel, x, y, 0)
+                        cleared.append((x, y))
+                        if not BLOCK_OPAQUE[chunk.tiles[y % CHUNK_SIZE, x % CHUNK_SIZE]]:
+                            darken.append((x, y, neighbour))
+                    elif neighbour >= level or (chunk is None and neighbour):
+                        # lit from somewhere else, it will shine back into the cleared area
+                        frontier.append((x, y))
+
+            for grid_x, grid_y in cleared:
+                chunk = chunks[(grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE)]
+                tile = int(chunk.tiles[grid_y % CHUNK_SIZE, grid_x % CHUNK_SIZE])
+                level = self.source(channel, grid_x, grid_y, tile)
+                if level > self.level(channel, grid_x, grid_y):
+                    self.set_level(chunk, channel, grid_x, grid_y, level)
+                    frontier.append((grid_x, grid_y))
+                # and whatever is next to a cleared cell may shine into it
+                frontier.extend((grid_x + dx, grid_y + dy) for dx, dy in self.NEIGHBOURS)
+            self.flood(channel, deque(cell for cell in frontier if self.passes(*cell)))
+        self.finish()
+
+    def column_cells(self, grid_x, old_top, new_top):
+        # the loaded cells of a column that gained or lost the sky when its surface moved. a
+        # column with nothing loaded was lit against the generator's surface, as in source()
+        guess = int(self.world.generator.heightmap(grid_x))
+        old_top = guess if old_top is None else old_top
+        new_top = guess if new_top is None else new_top
+        chunks = self.world.chunks
+        return [(grid_x, grid_y) for grid_y in range(min(old_top, new_top), max(old_top, new_top))
+                if (grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE) in chunks]
+
+    def finish(self):
+        for chunk in self.touched:
+            chunk.relit()
+        self.touched.clear()
+
+class World:
+    def __init__(self, directory=WORLD_DIR, seed=None):
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.generator = TerrainGenerator(self.seed)
+        self.chunks = {}
+        self.health = {}  # (grid_x, grid_y) -> remaining health, only for damaged blocks
+        self.heights = {}  # grid_x -> grid row of the topmost solid block loaded in that column
+        self.bottom_chunk = 0  # lowest chunk row seen, so column scans know where to stop
+        self.lights = LightEngine(self)
+        self.particles = ParticlePool(seed=self.seed)
+        self.storage = WorldStorage(directory)
+        self.streamed = set()  # chunk keys whose terrain is in memory, even if it is all air
+        self.dirty = set()  # chunk keys edited since the last save
+        self.pool = ThreadPoolExecutor(max_workers=CHUNK_WORKERS)
+        self.pending = {}  # chunk key -> future still being loaded or generated
+        self.finished = queue.Queue()  # (key, future) pairs handed back by the workers
+        self.last_position = None
+
+    def get_tile(self, grid_x, grid_y):
+        chunk = self.chunks.get((grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE))
+        if chunk is None:
+            return AIR
+        return int(chunk.tiles[grid_y % CHUNK_SIZE, grid_x % CHUNK_SIZE])
+
+    def set_tile(self, grid_x, grid_y, tile):
+        key = (grid_x // CHUNK_SIZE, grid_y // CHUNK_SIZE)
+        if key not in self.streamed:
+            # the edit has to land on the real terrain, not on an empty chunk it would later replace
+            self.load_now(key)
+        chunk = self.chunks.get(key)
+        created = chunk is None
+        if created:
+            if tile == AIR:
+                return
+            chunk = self.chunks[key] = Chunk(*key)
+        chunk.edit()[grid_y % CHUNK_SIZE, grid_x % CHUNK_SIZE] = tile
+        self.dirty.add(key)
+        self.health.pop((grid_x, grid_y), None)
+
+        top = self.heights.get(grid_x)
+        if tile != AIR:
+            if top is None or grid_y < top:
+                self.heights[grid_x] = grid_y
+        elif grid_y == top:
+            self.set_surface(grid_x, self.find_surface(grid_x, grid_y + 1))
+
+        shaded = self.lights.column_cells(grid_x, top, self.heights.get(grid_x))
+        if created:
+            self.lights.add_chunk(chunk, shaded)
+        else:
+            self.lights.relight([(grid_x, grid_y)] + shaded)
+
+    def surface(self, grid_x):
+        # grid row of the topmost solid block in a column, or None if none of it is loaded
+        return self.heights.get(grid_x)
+
+    def set_surface(self, grid_x, grid_y):
+        if grid_y is None:
+            self.heights.pop(grid_x, None)
+        else:
+            self.heights[grid_x] = grid_y
+
+    def find_surface(self, grid_x, start_y):
+        # first solid row at or below start_y; only runs when the top block of a column goes
+        # away, and the next block down is almost always in the same chunk
+        chunk_x, local_x = grid_x // CHUNK_SIZE, grid_x % CHUNK_SIZE
+        for chunk_y in range(start_y // CHUNK_SIZE, self.bottom_chunk + 1):
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None:
+                continue
+            offset = max(start_y - chunk_y * CHUNK_SIZE, 0)
+            solid = np.flatnonzero(chunk.tiles[offset:, local_x])
+            if len(solid):
+                return chunk_y * CHUNK_SIZE + offset + int(solid[0])
+        return None
+
+    # kept for code that still thinks in Block objects, set_tile does the work
+    def add_block(self, block):
+        self.set_tile(block.rect.x // TILE_SIZE, block.rect.y // TILE_SIZE, block.id)
+
+    def remove_block(self, block):
+        self.set_tile(block.rect.x // TILE_SIZE, block.rect.y // TILE_SIZE, AIR)
+
+    def get_block(self, grid_x, grid_y):
+        tile = self.get_tile(grid_x, grid_y)
+        if tile == AIR:
+            return None
+        return Block(grid_x * TILE_SIZE, grid_y * TILE_SIZE, tile)
+
+    def get_health(self, grid_x, grid_y):
+        health = self.health.get((grid_x, grid_y))
+        if health is None:
+            tile = self.get_tile(grid_x, grid_y)
+            return BLOCKS[tile].hardness if tile != AIR else 0
+        return health
+
+    def damage_block(self, grid_x, grid_y, amount):
+        health = self.get_health(grid_x, grid_y) - amount
+        if health <= 0:
+            self.set_tile(grid_x, grid_y, AIR)
+            return True
+        self.health[(grid_x, grid_y)] = health
+        return False
+
+    def blast(self, center, radius):
+        # stamps a precomputed circular mask onto the grid and clears whatever can't resist it;
+        # each chunk under the mask is edited and invalidated once, however many blocks go
+        reach, strength = blast_mask(radius)
+        size = 2 * reach + 1
+        left = int(center[0]) // TILE_SIZE - reach
+        top = int(center[1]) // TILE_SIZE - reach
+        columns = set()
+        cleared = []
+        destroyed = 0
+        for chunk_y in range(top // CHUNK_SIZE, (top + size - 1) // CHUNK_SIZE + 1):
+            for chunk_x in range(left // CHUNK_SIZE, (left + size - 1) // CHUNK_SIZE + 1):
+                key = (chunk_x, chunk_y)
+                if key not in self.streamed:
+                    self.load_now(key)
+                chunk = self.chunks.get(key)
+                if chunk is None:
+                    continue
+                # the part of the mask that falls inside this chunk, in grid cells
+                x0, x1 = max(left, chunk_x * CHUNK_SIZE), min(left + size, (chunk_x + 1) * CHUNK_SIZE)
+                y0, y1 = max(top, chunk_y * CHUNK_SIZE), min(top + size, (chunk_y + 1) * CHUNK_SIZE)
+                cells = (slice(y0 - chunk_y * CHUNK_SIZE, y1 - chunk_y * CHUNK_SIZE),
+                         slice(x0 - chunk_x * CHUNK_SIZE, x1 - chunk_x * CHUNK_SIZE))
+                tiles = chunk.tiles[cells]
+                hit = (tiles != AIR) & (strength[y0 - top:y1 - top, x0 - left:x1 - left] > BLAST_RESISTANCE[tiles])
+                if not hit.any():
+                    continue
+                chunk.edit()[cells][hit] = AIR
+                self.dirty.add(key)
+                rows, cols = np.nonzero(hit)
+                destroyed += len(rows)
+                columns.update((cols + x0).tolist())
+                cleared.extend(zip((cols + x0).tolist(), (rows + y0).tolist()))
+
+        if self.health:
+            for cell in cleared:
+                self.health.pop(cell, None)
+        for grid_x in columns:
+            top_row = self.heights.get(grid_x)
+            if top_row is not None and self.get_tile(grid_x, top_row) == AIR:
+                self.set_surface(grid_x, self.find_surface(grid_x, top_row + 1))
+                cleared += self.lights.column_cells(grid_x, top_row, self.heights.get(grid_x))
+        if cleared:
+            self.lights.relight(cleared)
+        return destroyed
+
+    def raycast(self, start, end):
+        # steps through the grid cells the segment from start to end crosses, in order, and
+        # returns the first solid one, or None if the way is clear
+        x, y = start
+        dx, dy = end[0] - x, end[1] - y
+        grid_x, grid_y = int(x // TILE_SIZE), int(y // TILE_SIZE)
+        end_x, end_y = int(end[0] // TILE_SIZE), int(end[1] // TILE_SIZE)
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        # how far along the segment (0..1) the next vertical and horizontal grid lines are
+        next_x = ((grid_x + (step_x > 0)) * TILE_SIZE - x) / dx if dx else math.inf
+        next_y = ((grid_y + (step_y > 0)) * TILE_SIZE - y) / dy if dy else math.inf
+        delta_x = TILE_SIZE / abs(dx) if dx else math.inf
+        delta_y = TILE_SIZE / abs(dy) if dy else math.inf
+        for _ in range(abs(end_x - grid_x) + abs(end_y - grid_y) + 1):
+            if BLOCK_SOLID[self.get_tile(grid_x, grid_y)]:
+                return grid_x, grid_y
+            if next_x < next_y:
+                next_x += delta_x
+                grid_x += step_x
+            else:
+                next_y += delta_y
+                grid_y += step_y
+        return None
+
+    def solid_cells(self, left, top, width, height):
+        # only the handful of grid cells a box overlaps, however many blocks are loaded
+        cells = []
+        for grid_y in range(math.floor(top / TILE_SIZE), math.ceil((top + height) / TILE_SIZE)):
+            for grid_x in range(math.floor(left / TILE_SIZE), math.ceil((left + width) / TILE_SIZE)):
+                if BLOCK_SOLID[self.get_tile(grid_x, grid_y)]:
+                    cells.append((grid_x, grid_y))
+        return cells
+
+    def get_nearby_blocks(self, position, radius):
+        nearby = []
+        chunk_radius = radius // CHUNK_PIXELS + 1
+        center_chunk_x = position[0] // CHUNK_PIXELS
+        center_chunk_y = position[1] // CHUNK_PIXELS
+        
+        for x in range(center_chunk_x - chunk_radius, center_chunk_x + chunk_radius + 1):
+            for y in range(center_chunk_y - chunk_radius, center_chunk_y + chunk_radius + 1):
+                chunk = self.chunks.get((x, y))
+                if chunk is not None:
+                    nearby.extend(chunk.blocks())
+        return nearby
+    
+    def add_particles(self, x, y, color, amount):
+        self.particles.emit(x, y, color, amount)
+    
+    def update_particles(self):
+        self.particles.update()
+    
+    def draw_particles(self, screen, camera):
+        return self.particles.draw(screen, camera)
+    
+    def is_loaded(self, x, y):
+        return (int(x) // CHUNK_PIXELS, int(y) // CHUNK_PIXELS) in self.streamed
+
+    def chunks_around(self, position, radius):
+        chunk_radius = radius // CHUNK_PIXELS + 1
+        center_chunk_x = int(position[0]) // CHUNK_PIXELS
+        center_chunk_y = int(position[1]) // CHUNK_PIXELS
+        return [(x, y) for x in range(center_chunk_x - chunk_radius, center_chunk_x + chunk_radius + 1)
+                for y in range(center_chunk_y - chunk_radius, center_chunk_y + chunk_radius + 1)]
+
+    def read_chunk(self, key):
+        # runs on the worker pool: nothing here may touch self.chunks
+        tiles = self.storage.load_chunk(*key)
+        if tiles is None:
+            tiles = self.generator.generate_chunk(*key)
+        return tiles
+
+    def install(self, key, tiles):
+        self.streamed.add(key)
+        if key not in self.chunks and tiles.any():
+            chunk = self.chunks[key] = Chunk(key[0], key[1], tiles)
+            self.bottom_chunk = max(self.bottom_chunk, key[1])
+            solid = tiles != AIR
+            tops = solid.argmax(axis=0) + key[1] * CHUNK_SIZE
+            shaded = []  # cells further down that this chunk now keeps from the sky
+            for local_x in np.flatnonzero(solid.any(axis=0)).tolist():
+                grid_x = key[0] * CHUNK_SIZE + local_x
+                top = self.heights.get(grid_x)
+                if top is None or tops[local_x] < top:
+                    self.heights[grid_x] = int(tops[local_x])
+                    shaded += [cell for cell in self.lights.column_cells(grid_x, top, self.heights[grid_x])
+                               if cell[1] // CHUNK_SIZE != key[1]]
+            self.lights.add_chunk(chunk, shaded)
+
+    def load_now(self, key):
+        future = self.pending.pop(key, None)
+        if future is not None and not future.cancel():
+            self.install(key, future.result())
+        else:
+            self.install(key, self.read_chunk(key))
+
+    def request(self, key):
+        future = self.pool.submit(self.read_chunk, key)
+        future.add_done_callback(lambda future, key=key: self.finished.put((key, future)))
+        self.pending[key] = future
+
+    def drain(self, budget=STREAM_BUDGET):
+        # hands finished chunks to the world until this frame's budget is used up
+        deadline = time.perf_counter() + budget
+        while time.perf_counter() < deadline:
+            try:
+                key, future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if self.pending.get(key) is not future or future.cancelled():
+                continue
+            del self.pending[key]
+            self.install(key, future.result())
+
+    def stream(self, position, radius, wait=False):
+        # the chunks right around the player are loaded on the spot since collision needs them
+        # this tick; everything else in range, and ahead of where the player is heading, is
+        # loaded or generated on the worker pool and picked up by drain once per frame
+        if self.last_position is None:
+            self.last_position = position
+        ahead = (position[0] + (position[0] - self.last_position[0]) * PREFETCH_TICKS,
+                 position[1] + (position[1] - self.last_position[1]) * PREFETCH_TICKS)
+        self.last_position = position
+
+        wanted = set(self.chunks_around(position, radius)) | set(self.chunks_around(ahead, radius))
+        if wait:
+            # everything is loaded before returning, so nothing depends on the worker pool's timing
+            for key in sorted(wanted - self.streamed):
+                self.load_now(key)
+        else:
+            for key in self.chunks_around(position, 0):
+                if key not in self.streamed:
+                    self.load_now(key)
+            center_x, center_y = position[0] / CHUNK_PIXELS, position[1] / CHUNK_PIXELS
+            for key in sorted(wanted - self.streamed - self.pending.keys(),
+                              key=lambda key: abs(key[0] + 0.5 - center_x) + abs(key[1] + 0.5 - center_y)):
+                self.request(key)
+
+        keep = radius + KEEP_CHUNKS * CHUNK_PIXELS
+        kept = set(self.chunks_around(position, keep)) | set(self.chunks_around(ahead, keep))
+        for key in [key for key in self.streamed | self.pending.keys() if key not in kept]:
+            self.evict(key)
+
+    def evict(self, key):
+        # generated chunks can always be rebuilt from the seed, edited ones are saved first
+        if key in self.dirty:
+            chunk = self.chunks.get(key)
+            tiles = chunk.tiles if chunk is not None else np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+            self.storage.save_chunk(key[0], key[1], tiles)
+            self.dirty.discard(key)
+        future = self.pending.pop(key, None)
+        if future is not None:
+            future.cancel()
+        self.chunks.pop(key, None)
+        self.streamed.discard(key)
+        # the light of the chunks left behind is kept as it was, an unloaded chunk doesn't cast shade
+        first_row, next_row = key[1] * CHUNK_SIZE, (key[1] + 1) * CHUNK_SIZE
+        for grid_x in range(key[0] * CHUNK_SIZE, (key[0] + 1) * CHUNK_SIZE):
+            top = self.heights.get(grid_x)
+            if top is not None and first_row <= top < next_row:
+                self.set_surface(grid_x, self.find_surface(grid_x, next_row))
+
+    def save(self):
+        # only chunks edited since the last save are written
+        for key in self.dirty:
+            chunk = self.chunks.get(key)
+            tiles = chunk.tiles if chunk is not None else np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+            self.storage.save_chunk(key[0], key[1], tiles)
+        self.dirty.clear()
+        self.storage.write_level({"format": REGION_VERSION, "seed": self.seed})
+        self.storage.flush()
+    
+    def close(self):
+        # stops the workers and lets go of every region file, so the world's directory can be
+        # deleted; Windows won't remove a file that is still open or mapped. it doesn't save
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+        self.finished = queue.Queue()
+        for chunk in self.chunks.values():
+            if not chunk.tiles.flags.writeable:
+                # still a view into a region file, the chunk keeps its own copy
+                chunk.tiles = chunk.tiles.copy()
+        self.storage.close()
+
+    def load(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.chunks = {}
+        self.health = {}
+        self.heights = {}
+        self.bottom_chunk = 0
+        self.streamed = set()
+        self.dirty = set()
+        self.pending = {}
+        self.last_position = None
+        if not self.storage.exists():
+            # only the default world can be an upgrade of the old single-file save
+            if self.storage.directory == WORLD_DIR and os.path.exists(LEGACY_SAVE):
+                print(f"Converting {LEGACY_SAVE} to region files")
+                convert_legacy_world(LEGACY_SAVE, self.storage, self.seed)
+            else:
+                print("No saved world found - generating new one")
+                self.storage.write_level({"format": REGION_VERSION, "seed": self.seed})
+        self.seed = self.storage.read_level().get("seed", self.seed)
+        self.generator = TerrainGenerator(self.seed)
+
+def move_box(world, x, y, width, height, dx, dy):
+    # moves a box one axis at a time and pushes it out of any solid cell it ends up in.
+    # returns the new position plus whether it hit a wall, landed or hit a ceiling
+    blocked = landed = bumped = False
+    if dx:
+        x += dx
+        cells = world.solid_cells(x, y, width, height)
+        if cells:
+            if dx > 0:
+                x = min(cell_x for cell_x, _ in cells) * TILE_SIZE - width
+            else:
+                x = (max(cell_x for cell_x, _ in cells) + 1) * TILE_SIZE
+            blocked = True
+
+    if dy:
+        y += dy
+        cells = world.solid_cells(x, y, width, height)
+        if cells:
+            if dy > 0:
+                y = min(cell_y for _, cell_y in cells) * TILE_SIZE - height
+                landed = True
+            else:
+                y = (max(cell_y for _, cell_y in cells) + 1) * TILE_SIZE
+                bumped = True
+    return x, y, blocked, landed, bumped
+
+def physics_step(entity, world, dx, dy):
+    # returns how fast the entity was falling when it landed, 0 if it didn't land
+    pos = entity.world_pos
+    pos[0], pos[1], entity.blocked, entity.on_ground, bumped = move_box(
+        world, pos[0], pos[1], entity.rect.width, entity.rect.height, dx, dy)
+    impact = dy if entity.on_ground else 0
+    if entity.on_ground or bumped:
+        entity.gravity = 0
+
+    entity.rect.x = pos[0]
+    entity.rect.y = pos[1]
+    return impact
+
+class Camera:
+    def __init__(self, width, height, scale=1):
+        self.camera = pygame.Rect(0, 0, width, height)
+        self.width = width
+        self.height = height
+        self.scale = scale  # pixels drawn per world pixel, below 1 when rendering at a lower resolution
+
+    def to_screen(self, x, y):
+        return (math.floor((x - self.camera.x) * self.scale), math.floor((y - self.camera.y) * self.scale))
+    
+    def apply(self, entity):
+        return entity.rect.move(-self.camera.x, -self.camera.y)
+    
+    def update(self, target, alpha=1.0):
+        x, y = target.render_pos(alpha)
+        x = int(x) + target.rect.width // 2 - self.width // 2
+        y = int(y) + target.rect.height // 2 - self.height // 2
+        self.camera = pygame.Rect(x, y, self.width, self.height)
+
+class TerrainRenderer:
+    # every chunk is drawn once into an off-screen surface and reused until one of its
+    # blocks changes, so the terrain pass is a handful of chunk blits per frame
+    def __init__(self, world, capacity=16):
+        self.world = world
+        self.capacity = capacity
+        self.surfaces = OrderedDict()  # chunk key -> (chunk version, surface), least recent first
+        self.texture_version = textures.version
+        self.scale = 1
+
+    def render_chunk(self, chunk):
+        surface = pygame.Surface((CHUNK_PIXELS, CHUNK_PIXELS), pygame.SRCALPHA)
+        images = [None] + [textures.get(block_type.texture, (50, 50), block_type.color)
+                           for block_type in BLOCKS[1:]]
+        rows, cols = np.nonzero(chunk.tiles)
+        surface.blits([(images[tile], (col * TILE_SIZE, row * TILE_SIZE)) for row, col, tile in zip(
+            rows.tolist(), cols.tolist(), chunk.tiles[rows, cols].tolist())], doreturn=False)
+        alpha = LIGHT_ALPHA[chunk.light.max(axis=0)]
+        if alpha.any():
+            # one black pixel per cell with the darkness as its alpha, stretched over the chunk
+            shade = pygame.Surface((CHUNK_SIZE, CHUNK_SIZE), pygame.SRCALPHA)
+            pygame.surfarray.pixels_alpha(shade)[:] = alpha.T
+            surface.blit(pygame.transform.scale(shade, (CHUNK_PIXELS, CHUNK_PIXELS)), (0, 0))
+        if self.scale != 1:
+            # scaled once here, so a low render resolution doesn't pay for it every frame
+            size = math.ceil(CHUNK_PIXELS * self.scale)
+            surface = pygame.transform.smoothscale(surface, (size, size))
+        return surface
+
+    def draw(self, screen, camera):
+        # returns the screen areas of chunks that were redrawn, for the dirty-rect update
+        if self.texture_version != textures.version or self.scale != camera.scale:
+            self.surfaces.clear()
+            self.texture_version = textures.version
+            self.scale = camera.scale
+
+        rebuilt = []
+        view = camera.camera
+        for chunk_y in range(view.top // CHUNK_PIXELS, (view.bottom - 1) // CHUNK_PIXELS + 1):
+            for chunk_x in range(view.left // CHUNK_PIXELS, (view.right - 1) // CHUNK_PIXELS + 1):
+                key = (chunk_x, chunk_y)
+                chunk = self.world.chunks.get(key)
+                if chunk is None:
+                    continue
+                cached = self.surfaces.get(key)
+                changed = cached is None or cached[0] != chunk.version
+                if changed:
+                    cached = (chunk.version, self.render_chunk(chunk))
+                    self.surfaces[key] = cached
+                self.surfaces.move_to_end(key)
+                drawn = screen.blit(cached[1], camera.to_screen(chunk_x * CHUNK_PIXELS, chunk_y * CHUNK_PIXELS))
+                if changed:
+                    rebuilt.append(drawn)
+
+        while len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return rebuilt
+
+class BlockType:
+    # everything the game knows about one kind of block; the tile grid only stores its id
+    def __init__(self, id, name, drop, texture, color, particle_color, hardness,
+                 blast_resistance=0.0, solid=True, opaque=True, light=0):
+        self.id = id
+        self.name = name  # class name the old pickle saves used
+        self.drop = drop  # inventory item mining it gives, also what placing that item puts down
+        self.texture = texture
+        self.color = color  # fallback when the texture is missing
+        self.particle_color = particle_color
+        self.hardness = hardness  # mining health
+        self.breakable = hardness != float('inf')
+        self.blast_resistance = blast_resistance  # blast strength, from 1 at the center to 0 at the edge, it shrugs off
+        self.solid = solid
+        self.opaque = opaque  # stops light
+        self.light = light  # block light it gives off, for torches and the like
+
+BLOCKS = [None] * 10
+for block_type in [
+    BlockType(GRASS, "Grassblock", "grass", "grass", (0, 255, 0), (0, 255, 0), 50),
+    BlockType(DIRT, "Dirtblock", "dirt", "dirt", (139, 69, 19), (139, 69, 19), 50),
+    BlockType(STONE, "Stoneblock", "stone", "stone", (128, 128, 128), (128, 128, 128), 175, blast_resistance=0.2),
+    BlockType(IRON_ORE, "IronOre", "ironore", "iron", (74, 75, 76), (100, 100, 110), 200, blast_resistance=0.3),
+    BlockType(COAL, "Coal", "coal", "coal", (54, 69, 79), (54, 69, 79), 170, blast_resistance=0.2),
+    BlockType(DIAMOND, "Diamond", "diamond", "diamond", SKY_BLUE, SKY_BLUE, 250, blast_resistance=0.5),
+    BlockType(BEDROCK, "Bedrock", None, "bedrock", (0, 0, 0), (0, 0, 0), float('inf'), blast_resistance=float('inf')),
+    BlockType(WOOD, "Wood", "wood", "wood", (161, 102, 47), (160, 82, 45), 100),
+    BlockType(LEAVES, "Leaves", "leaves", "leaves", (74, 124, 89), (0, 200, 0), 10),
+]:
+    BLOCKS[block_type.id] = block_type
+
+# lookup tables for the hot paths, indexed by tile id or keyed by name
+BLOCK_NAMES = {block_type.name: block_type for block_type in BLOCKS[1:]}
+ITEM_BLOCKS = {block_type.drop: block_type for block_type in BLOCKS[1:] if block_type.drop}
+BLOCK_SOLID = [False] + [block_type.solid for block_type in BLOCKS[1:]]
+BLOCK_OPAQUE = [False] + [block_type.opaque for block_type in BLOCKS[1:]]
+BLOCK_LIGHT = [0] + [block_type.light for block_type in BLOCKS[1:]]
+BLAST_RESISTANCE = np.array([0.0] + [block_type.blast_resistance for block_type in BLOCKS[1:]])
+
+class Block:
+    # a view of one grid cell, built on demand for code that wants an object rather than an id
+    def __init__(self, x, y, id):
+        self.x = x
+        self.y = y
+        self.id = id
+        self.type = BLOCKS[id]
+        self.rect = pygame.Rect(x, y, 50, 50)
+        self.image = textures.get(self.type.texture, (50, 50), self.type.color)
+        self.max_health = self.type.hardness
+        self.health = self.max_health
+
+    # views of the same grid cell compare equal even after the chunk rebuilds them
+    def __eq__(self, other):
+        if not isinstance(other, Block):
+            return NotImplemented
+        return (self.x, self.y, self.id) == (other.x, other.y, other.id)
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.id))
+
+    def draw_health_bar(self, screen, camera):
+        if self.health < self.max_health:
+            bar_width = 50
+            health_pct = self.health / self.max_health
+            bar_x = self.rect.x - camera.camera.x
+            bar_y = self.rect.y - camera.camera.y - 10
+
+            pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, 5))
+
+            health_width = int(bar_width * health_pct)
+            health_color = (0, 255, 0) if health_pct > 0.6 else (255, 255, 0) if health_pct > 0.3 else (255, 0, 0)
+            pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, 5))
+            
+    def draw(self, screen, camera):
+        screen.blit(self.image, (self.rect.x - camera.camera.x, self.rect.y - camera.camera.y))
+
+
+BLAST_MASKS = {}  # radius -> (reach in cells, blast strength over the square of cells around the center)
+
+def blast_mask(radius):
+    mask = BLAST_MASKS.get(radius)
+    if mask is None:
+        reach = int(radius // TILE_SIZE) + 1
+        offsets = np.arange(-reach, reach + 1) * TILE_SIZE
+        distance = np.hypot(offsets.reshape(-1, 1), offsets.reshape(1, -1))
+        mask = BLAST_MASKS[radius] = (reach, np.clip(1 - distance / radius, 0, None))
+    return mask
+
+def hash_noise(seed, salt, x, y=0):
+    # a deterministic value in [0, 1) for every (seed, salt, x, y), so any cell of the
+    # world can be worked out on its own without generating its neighbours first
+    with np.errstate(over="ignore"):
+        h = (np.asarray(x, dtype=np.int64).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) ^
+             np.asarray(y, dtype=np.int64).astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F) ^
+             np.uint64((seed * 0x100000001B3 + salt * 0x27D4EB2F165667C5) % 2 ** 64))
+        h ^= h >> np.uint64(33)
+        h *= np.uint64(0xFF51AFD7ED558CCD)
+        h ^= h >> np.uint64(33)
+        h *= np.uint64(0xC4CEB9FE1A85EC53)
+        h ^= h >> np.uint64(33)
+    return (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+class TerrainGenerator:
+    # every chunk is a pure function of (seed, chunk_x, chunk_y), so chunks can be made in any
+    # order, thrown away and made again identically
+    ORE, DIAMOND, IRON, TREE, TREE_HEIGHT, TREE_BONUS, TREE_BONUS_HEIGHT, LEAVES, TOP_LEAF = range(9)
+
+    def __init__(self, seed):
+        self.seed = seed
+
+    def noise(self, salt, x, y=0):
+        return hash_noise(self.seed, salt, x, y)
+
+    def heightmap(self, grid_x):
+        # grass row of each column before anything is built on it; layers and trees are placed
+        # relative to this instead of being searched for in the finished terrain
+        return np.full(np.shape(grid_x), SURFACE_ROW, dtype=np.int64)
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        rows = np.arange(chunk_y * CHUNK_SIZE, (chunk_y + 1) * CHUNK_SIZE).reshape(-1, 1)
+        cols = np.arange(chunk_x * CHUNK_SIZE, (chunk_x + 1) * CHUNK_SIZE).reshape(1, -1)
+        rows, cols = np.broadcast_arrays(rows, cols)
+        tiles = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+        if rows[-1, 0] < 0 or rows[0, 0] > BEDROCK_ROW:
+            return tiles
+
+        surface = self.heightmap(cols)
+        depth = rows * TILE_SIZE - HEIGHT
+        is_ore = self.noise(self.ORE, cols, rows) < 0.05
+        ore = np.where((depth > 800) & (self.noise(self.DIAMOND, cols, rows) < 0.3), DIAMOND,
+                       np.where((depth > 500) & (self.noise(self.IRON, cols, rows) < 0.5), IRON_ORE, COAL))
+        tiles[:] = np.select(
+            [rows == surface, (rows > surface) & (rows < surface + STONE_ROW - SURFACE_ROW),
+             (rows >= surface + STONE_ROW - SURFACE_ROW) & (rows < BEDROCK_ROW), rows == BEDROCK_ROW],
+            [GRASS, DIRT, np.where(is_ore, ore, STONE), BEDROCK], AIR)
+
+        # trees reach one column either side of their trunk, so check the neighbouring columns too
+        for grid_x in range(cols[0, 0] - 1, cols[0, -1] + 2):
+            for x, y, tile in self.tree_blocks(grid_x):
+                local_x, local_y = x - cols[0, 0], y - rows[0, 0]
+                if 0 <= local_x < CHUNK_SIZE and 0 <= local_y < CHUNK_SIZE:
+                    tiles[local_y, local_x] = tile
+        return tiles
+
+    def tree_blocks(self, grid_x):
+        # trunk first, then the leaves over it; empty for columns without a tree
+        if grid_x % 4 != 0 or self.noise(self.TREE, grid_x) >= 0.35:
+            return []
+        base = int(self.heightmap(grid_x)) - 1
+        height = 4 + int(self.noise(self.TREE_HEIGHT, grid_x) * 4)
+        if self.noise(self.TREE_BONUS, grid_x) < 0.2:
+            height += 1 + int(self.noise(self.TREE_BONUS_HEIGHT, grid_x) * 2)
+
+        blocks = [(grid_x, base - i, WOOD) for i in range(height)]
+        for layer in range(1, height - 1):
+            for i in range(-1, 2):
+                if self.noise(self.LEAVES, grid_x + i, layer) > 0.2:
+                    blocks.append((grid_x + i, base - layer, LEAVES))
+        top = base - (height - 1)
+        blocks.extend((grid_x + i, top, LEAVES) for i in range(-1, 2))
+        if self.noise(self.TOP_LEAF, grid_x) > 0.7:
+            blocks.append((grid_x, top - 1, LEAVES))
+        return blocks
+
+class Player:
+    def __init__(self):
+        self.world_pos = [500, HEIGHT - 200]
+        self.prev_pos = list(self.world_pos)  # position at the start of the tick, for interpolation
+        self.jump_power = -20
+        self.can_jump = True
+        self.gravity = 0
+        self.rect = pygame.Rect(self.world_pos[0], self.world_pos[1], 50, 150)
+        self.on_ground = False
+        self.sprinting = False
+        self.speed = 3.317
+        self.facing_right = True
+        self.health = 20
+        self.max_health = 20
+        self.damage_frames = 0
+        self.damage_delay = 30
+        self.hurt_ticks = 0  # how much longer the sprite shows the damage tint
+        self.selected_slot = 0
+        self.inventory = {i: {"type": None, "count": 0} for i in range(9)}
+        self.mining_block = None
+        self.mining_progress = 0
+        self.mining_speed = 1  
+        self.max_mine_distance = 250
+        self.max_safe_fall = 25 
+        self.fall_damage = 0  
+        self.attack = 1
+        self.heart_size = 20 
+        self.heart_images = self.load_heart_images()
+        
+                
+    def sprite(self, scale=1):
+        return sprites.get("steve", (50, 150), (255, 0, 0), self.facing_right, "hurt" if self.hurt_ticks else None, scale)
+    def update(self, world, dx=0):
+        self.prev_pos[:] = self.world_pos
+        self.gravity += 0.8
+
+        impact = physics_step(self, world, dx, self.gravity)
+        if impact > self.max_safe_fall:
+            self.health -= (impact - self.max_safe_fall) * 0.2
+            hurt_sound.play()
+        if self.on_ground:
+            self.can_jump = True
+    def render_pos(self, alpha):
+        # where to draw the player between the last two ticks
+        return (self.prev_pos[0] + (self.world_pos[0] - self.prev_pos[0]) * alpha,
+                self.prev_pos[1] + (self.world_pos[1] - self.prev_pos[1]) * alpha)
+
+    def craft(self):
+        pass
+    def load_heart_images(self):
+        size = (self.heart_size, self.heart_size)
+        return {
+            "full": textures.get("heart_full", size, (255, 0, 0)),
+            "half": textures.get("heart_half", size, (255, 100, 100)),
+            "empty": textures.get("heart_empty", size, (50, 50, 50))
+        }
+ 
+# mobs
+def explode(world, player, center, radius, damage, mobs=None):
+    world.add_particles(center[0], center[1], (0, 255, 0), 30)
+
+    distance = math.hypot(player.rect.centerx - center[0], player.rect.centery - center[1])
+    if distance < radius:
+        player.health -= damage * (1 - distance / radius)
+        hurt_sound.play()
+    if mobs is not None:
+        mobs.blast(center, radius, damage)
+
+    world.blast(center, radius)
+
+class WanderAI:
+    # passive mobs stroll in one direction, turn around or stand still for a while
+    def update(self, mobs, idx, player, world):
+        rng = mobs.rng
+        wandering = idx[mobs.state[idx] == WANDERING]
+        idle = idx[mobs.state[idx] == IDLE]
+
+        mobs.move_timer[wandering] -= 1
+        expired = wandering[mobs.move_timer[wandering] <= 0]
+        choice = rng.random(len(expired))
+        to_idle = expired[choice < 0.3]
+        turn = expired[(choice >= 0.3) & (choice < 0.6)]
+        keep = expired[choice >= 0.6]
+        mobs.state[to_idle] = IDLE
+        mobs.idle_timer[to_idle] = rng.integers(60, 121, len(to_idle))
+        mobs.move_dir[turn] *= -1
+        mobs.move_timer[turn] = rng.integers(120, 241, len(turn))
+        mobs.move_timer[keep] = rng.integers(60, 181, len(keep))
+        mobs.dx[wandering] += mobs.move_dir[wandering] * mobs.speed[wandering]
+
+        mobs.idle_timer[idle] -= 1
+        rested = idle[mobs.idle_timer[idle] <= 0]
+        mobs.state[rested] = WANDERING
+        mobs.move_timer[rested] = rng.integers(120, 241, len(rested))
+        mobs.move_dir[rested] *= rng.choice((-1, 1), len(rested))
+
+        mobs.facing[idx] = mobs.move_dir[idx] > 0
+
+class ChaseAI:
+    # walks at the player, twice as fast once close, and hurts on contact
+    def __init__(self, aggro_range=250, contact_damage=0.0):
+        self.aggro_range = aggro_range
+        self.contact_damage = contact_damage
+
+    def update(self, mobs, idx, player, world):
+        idx = idx[(mobs.knockback[idx] <= 0) & (mobs.fuse[idx] < 0)]
+        offset = player.world_pos[0] - mobs.x[idx]
+        direction = np.where(offset > 0, 1, -1)
+        near = np.abs(offset) <= self.aggro_range
+        mobs.dx[idx] += direction * mobs.speed[idx] * (1 + near)
+        mobs.facing[idx] = direction > 0
+
+        if self.contact_damage and near.any():
+            touching = near & mobs.touching(player.rect)[idx]
+            if touching.any():
+                player.health -= self.contact_damage * np.count_nonzero(touching)
+                hurt_sound.play()
+
+class FuseAI:
+    # lights when it touches the player, freezes in place and blows up when the fuse runs out
+    def __init__(self, fuse_time=60, radius=200, damage=0.5):
+        self.fuse_time = fuse_time
+        self.radius = radius
+        self.damage = damage
+
+    def update(self, mobs, idx, player, world):
+        unlit = idx[(mobs.fuse[idx] < 0) & mobs.touching(player.rect)[idx]]
+        mobs.fuse[unlit] = 0
+
+        lit = idx[mobs.fuse[idx] >= 0]
+        mobs.fuse[lit] += 1
+        mobs.frozen[lit] = True
+
+        # a blast sets off every other creeper inside it the same tick, so a chain resolves at once
+        waiting = np.ones(len(idx), dtype=np.bool_)
+        going = list(np.flatnonzero(mobs.fuse[idx] >= self.fuse_time))
+        waiting[going] = False
+        while going:
+            i = idx[going.pop()]
+            center = (int(mobs.x[i] + mobs.width[i] / 2), int(mobs.y[i] + mobs.height[i] / 2))
+            explode(world, player, center, self.radius, self.damage, mobs)
+            mobs.health[i] = 0
+            near = np.zeros(mobs.count, dtype=np.bool_)
+            near[mobs.grid().radius(center[0], center[1], self.radius)] = True
+            caught = waiting & near[idx]
+            waiting[caught] = False
+            going.extend(np.flatnonzero(caught).tolist())
+
+    def flashing(self, fuse):
+        return fuse > self.fuse_time - 20 and (fuse // 5) % 2 == 1
+
+class Species:
+    def __init__(self, name, texture, size, color, health, speed, max_safe_fall, jump_power,
+                 components, hostile=False, hittable=True, max_fall_speed=float('inf')):
+        self.name = name
+        self.texture = texture
+        self.size = size
+        self.color = color
+        self.health = health
+        self.speed = speed
+        self.max_safe_fall = max_safe_fall
+        self.jump_power = jump_power
+        self.components = components
+        self.hostile = hostile
+        self.hittable = hittable
+        self.max_fall_speed = max_fall_speed
+
+PASSIVE_SIZE = ((50 * 0.9) * 1.3, 59.375 * 1.3)
+SPECIES = [
+    Species("pig", "legend", PASSIVE_SIZE, (255, 192, 203), 5, (1.0, 3.0), 15, -15, [WanderAI()], max_fall_speed=20),
+    Species("sheep", "sheep", PASSIVE_SIZE, (255, 255, 255), 5, (1.0, 3.0), 15, -15, [WanderAI()], max_fall_speed=20),
+    Species("zombie", "zombie", (50, 150), (0, 255, 0), 10, 1.5, 25, -12, [ChaseAI(contact_damage=0.01)], hostile=True),
+    Species("spider", "spider", (150, 50), (255, 0, 0), 10, 1.5, 25, -12, [ChaseAI(contact_damage=0.01)], hostile=True),
+    Species("creeper", "creeper", ((59.375 * 1.2) * 1.5, ((50 * 0.9) * 2) * 1.5), (0, 200, 0), 10, 1.5, 25, -12,
+            [ChaseAI(aggro_range=0), FuseAI()], hostile=True),
+]
+SPECIES_IDS = {species.name: i for i, species in enumerate(SPECIES)}
+WANDERING, IDLE = 0, 1
+
+class SpatialHash:
+    # boxes filed under every grid cell they touch, sorted by cell, so a query only tests the
+    # boxes in the few cells it covers instead of every one of them
+    CELL = 128
+
+    def __init__(self, x, y, width, height, cell=CELL):
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+        self.right = self.x + width
+        self.bottom = self.y + height
+        self.cell = cell
+        left, top = self.x // cell, self.y // cell
+        spans_x = (self.right // cell - left).astype(np.int64) + 1
+        spans_y = (self.bottom // cell - top).astype(np.int64) + 1
+        boxes = np.arange(len(self.x))
+        items, keys = [boxes[:0]], [boxes[:0]]
+        for dx in range(int(spans_x.max(initial=0))):
+            for dy in range(int(spans_y.max(initial=0))):
+                inside = (dx < spans_x) & (dy < spans_y)
+                items.append(boxes[inside])
+                keys.append(self.key(left[inside] + dx, top[inside] + dy))
+        keys = np.concatenate(keys)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.items = np.concatenate(items)[order]
+
+    def key(self, cell_x, cell_y):
+        return (np.asarray(cell_x, dtype=np.int64) << 32) + np.asarray(cell_y, dtype=np.int64)
+
+    def candidates(self, left, top, right, bottom):
+        found = [self.items[:0]]
+        for cell_x in range(math.floor(left / self.cell), math.floor(right / self.cell) + 1):
+            first, last = self.key(cell_x, (math.floor(top / self.cell), math.floor(bottom / self.cell)))
+            start, end = np.searchsorted(self.keys, (first, last + 1))
+            found.append(self.items[start:end])
+        return np.unique(np.concatenate(found))
+
+    def point(self, x, y):
+        boxes = self.candidates(x, y, x, y)
+        return boxes[(self.x[boxes] <= x) & (x < self.right[boxes]) &
+                     (self.y[boxes] <= y) & (y < self.bottom[boxes])]
+
+    def box(self, left, top, width, height):
+        boxes = self.candidates(left, top, left + width, top + height)
+        return boxes[(self.x[boxes] < left + width) & (self.right[boxes] > left) &
+                     (self.y[boxes] < top + height) & (self.bottom[boxes] > top)]
+
+    def radius(self, x, y, radius):
+        # boxes whose center is within radius of the point
+        boxes = self.candidates(x - radius, y - radius, x + radius, y + radius)
+        centers_x = (self.x[boxes] + self.right[boxes]) / 2
+        centers_y = (self.y[boxes] + self.bottom[boxes]) / 2
+        return boxes[np.hypot(centers_x - x, centers_y - y) < radius]
+
+    def pairs(self):
+        # every two overlapping boxes, once each, lower index first. boxes sharing a cell sit
+        # next to each other in the sorted entries, so comparing each entry with the ones a
+        # step further along finds them all; it stops at the size of the fullest cell. a pair
+        # that shares several cells is only kept in the one holding the corner of the overlap
+        keys, items = self.keys, self.items
+        found = [(items[:0], items[:0], keys[:0])]
+        for step in range(1, len(keys)):
+            shared = keys[step:] == keys[:-step]
+            if not shared.any():
+                break
+            found.append((items[:-step][shared], items[step:][shared], keys[step:][shared]))
+        first, second, cells = (np.concatenate(column) for column in zip(*found))
+        a, b = np.minimum(first, second), np.maximum(first, second)
+        corner_x, corner_y = np.maximum(self.x[a], self.x[b]), np.maximum(self.y[a], self.y[b])
+        keep = ((corner_x < np.minimum(self.right[a], self.right[b])) &
+                (corner_y < np.minimum(self.bottom[a], self.bottom[b])) &
+                (self.key(corner_x // self.cell, corner_y // self.cell) == cells))
+        return a[keep], b[keep]
+
+class MobSystem:
+    # every mob lives in a row of these arrays, so gravity, knockback and AI timers
+    # run as one numpy operation per tick instead of one python method per mob
+    FIELDS = {
+        "species": np.int8, "x": np.float64, "y": np.float64, "prev_x": np.float64, "prev_y": np.float64, "dx": np.float64, "gravity": np.float64,
+        "width": np.int32, "height": np.int32, "speed": np.float64, "health": np.float64,
+        "knockback": np.float64, "knockback_direction": np.int8, "facing": np.bool_,
+        "on_ground": np.bool_, "frozen": np.bool_, "hit_cooldown": np.int16, "state": np.int8,
+        "move_dir": np.int8, "move_timer": np.int32, "idle_timer": np.int32, "fuse": np.int32,
+    }
+    KNOCKBACK_RESISTANCE = 0.8
+    SEPARATION = 0.5  # sideways push per tick between two overlapping mobs
+    BLAST_KNOCKBACK = 25  # knockback right at the center of an explosion
+
+    def __init__(self, capacity=64, seed=None):
+        self.count = 0
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.max_safe_fall = np.array([species.max_safe_fall for species in SPECIES], dtype=np.float64)
+        self.jump_power = np.array([species.jump_power for species in SPECIES], dtype=np.float64)
+        self.max_fall_speed = np.array([species.max_fall_speed for species in SPECIES], dtype=np.float64)
+        self.hittable = np.array([species.hittable for species in SPECIES], dtype=np.bool_)
+        self.hostile = np.array([species.hostile for species in SPECIES], dtype=np.bool_)
+        self.index = None  # SpatialHash of where the mobs are, see grid()
+        self.components = {}
+        self.fuses = {}
+        for species_id, species in enumerate(SPECIES):
+            for component in species.components:
+                self.components.setdefault(component, []).append(species_id)
+                if isinstance(component, FuseAI):
+                    self.fuses[species_id] = component
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, name, x, y):
+        if self.count == self.capacity:
+            self._grow()
+        self.index = None
+        species = SPECIES[SPECIES_IDS[name]]
+        i = self.count
+        self.count += 1
+        for field in self.FIELDS:
+            getattr(self, field)[i] = 0
+        speed = species.speed
+        self.species[i] = SPECIES_IDS[name]
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.width[i], self.height[i] = species.size
+        self.speed[i] = self.rng.uniform(*speed) if isinstance(speed, tuple) else speed
+        self.health[i] = species.health
+        self.knockback_direction[i] = 1
+        self.facing[i] = self.rng.random() < 0.5
+        self.move_dir[i] = 1 if self.facing[i] else -1
+        self.move_timer[i] = self.rng.integers(120, 241)
+        self.fuse[i] = -1
+        return i
+
+    def remove(self, keep):
+        # compacts the arrays down to the rows in the keep mask
+        n = self.count
+        kept = np.count_nonzero(keep[:n])
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:kept] = array[:n][keep[:n]]
+        self.count = kept
+        self.index = None
+
+    def count_of(self, name):
+        return int(np.count_nonzero(self.species[:self.count] == SPECIES_IDS[name]))
+
+    def grid(self):
+        # built on first use after the mobs last moved, spawned or died, so every query in
+        # between shares one
+        if self.index is None:
+            n = self.count
+            self.index = SpatialHash(self.x[:n], self.y[:n], self.width[:n], self.height[:n])
+        return self.index
+
+    def touching(self, rect):
+        # a mask over every mob, set for the ones overlapping rect
+        mask = np.zeros(self.count, dtype=np.bool_)
+        mask[self.grid().box(*rect)] = True
+        return mask
+
+    def hit_at(self, point, damage, player):
+        hits = self.grid().point(*point)
+        hits = hits[self.hittable[self.species[hits]]]
+        if len(hits) == 0:
+            return False
+        i = hits[0]
+        self.health[i] -= damage
+        self.knockback_direction[i] = 1 if player.rect.centerx < self.x[i] else -1
+        self.knockback[i] = 15
+        self.hit_cooldown[i] = 10
+        if self.health[i] <= 0:
+            keep = np.ones(self.count, dtype=np.bool_)
+            keep[i] = False
+            self.remove(keep)
+        return True
+
+    def blast(self, center, radius, damage):
+        # mobs near an explosion are hurt and thrown away from it, more the closer they stood
+        hit = self.grid().radius(center[0], center[1], radius)
+        centers_x = self.x[hit] + self.width[hit] / 2
+        centers_y = self.y[hit] + self.height[hit] / 2
+        closeness = 1 - np.hypot(centers_x - center[0], centers_y - center[1]) / radius
+        self.health[hit] -= damage * closeness
+        self.knockback_direction[hit] = np.where(centers_x < center[0], -1, 1)
+        self.knockback[hit] = np.maximum(self.knockback[hit], self.BLAST_KNOCKBACK * closeness)
+        self.hit_cooldown[hit] = 10
+
+    def separate(self):
+        # overlapping mobs drift apart sideways instead of piling up in one spot
+        a, b = self.grid().pairs()
+        if len(a) == 0:
+            return
+        centers = self.x + self.width / 2
+        push = np.where(centers[a] <= centers[b], -self.SEPARATION, self.SEPARATION)
+        moving = ~self.frozen
+        np.add.at(self.dx, a[moving[a]], push[moving[a]])
+        np.add.at(self.dx, b[moving[b]], -push[moving[b]])
+
+    def update(self, world, player):
+        n = self.count
+        if n == 0:
+            return
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        all_idx = np.arange(n)
+        self.dx[:n] = 0
+        self.frozen[:n] = False
+
+        pushed = self.knockback[:n] > 0
+        self.dx[:n][pushed] += self.knockback_direction[:n][pushed] * self.knockback[:n][pushed]
+        self.knockback[:n] *= self.KNOCKBACK_RESISTANCE
+        self.knockback[:n][self.knockback[:n] < 0.5] = 0
+
+        for component, species_ids in self.components.items():
+            idx = all_idx[np.isin(self.species[:n], species_ids)]
+            if len(idx):
+                component.update(self, idx, player, world)
+        self.separate()
+
+        species = self.species[:n]
+        frozen = self.frozen[:n]
+        gravity = self.gravity[:n]
+        gravity[~frozen] = np.minimum(gravity[~frozen] + 0.8, self.max_fall_speed[species][~frozen])
+        dy = np.where(frozen, 0, gravity)
+
+        impacts = np.zeros(n)
+        for i, x, y, width, height, dx, fall in zip(all_idx.tolist(), self.x[:n].tolist(), self.y[:n].tolist(),
+                                                    self.width[:n].tolist(), self.height[:n].tolist(),
+                                                    self.dx[:n].tolist(), dy.tolist()):
+            if not world.is_loaded(x, y):
+                # mobs wait where they are until the terrain under them is streamed in
+                gravity[i] = 0
+                continue
+            x, y, blocked, landed, bumped = move_box(world, x, y, width, height, dx, fall)
+            self.x[i] = x
+            self.y[i] = y
+            self.on_ground[i] = landed
+            if landed:
+                impacts[i] = fall
+                gravity[i] = self.jump_power[species[i]] if blocked and not frozen[i] else 0
+            elif bumped:
+                gravity[i] = 0
+        self.index = None
+
+        hurt = impacts > self.max_safe_fall[species]
+        self.health[:n][hurt] -= (impacts[hurt] - self.max_safe_fall[species][hurt]) * 0.2
+        np.maximum(self.hit_cooldown[:n] - 1, 0, out=self.hit_cooldown[:n])
+
+        alive = self.health[:n] > 0
+        if not alive.all():
+            self.remove(alive)
+
+    def draw(self, screen, camera, alpha=1.0):
+        # returns where each mob was drawn, for the dirty-rect update
+        drawn = []
+        n = self.count
+        xs = self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha
+        ys = self.prev_y[:n] + (self.y[:n] - self.prev_y[:n]) * alpha
+        for species, x, y, facing, fuse, cooldown in zip(self.species[:n].tolist(), xs.tolist(), ys.tolist(),
+                                                          self.facing[:n].tolist(), self.fuse[:n].tolist(),
+                                                          self.hit_cooldown[:n].tolist()):
+            tint = None
+            if species in self.fuses and self.fuses[species].flashing(fuse):
+                tint = "flash"
+            elif cooldown:
+                tint = "hurt"
+            kind = SPECIES[species]
+            image = sprites.get(kind.texture, kind.size, kind.color, facing, tint, camera.scale)
+            drawn.append(screen.blit(image, camera.to_screen(x, y)))
+        return drawn
+
+class MobSpawner:
+    # a couple of spawn attempts every tick instead of bursts: each picks a column just out of
+    # view, stands a mob on its surface or on the floor of a dark cave, and gives up quietly when
+    # the cell is blocked or a cap is reached. mobs left far behind are dropped, so the count
+    # stays bounded however far the player goes
+    ATTEMPTS = 2  # per tick
+    NEAREST = WIDTH // 2 + TILE_SIZE  # closer than this a mob would pop up on screen
+    FARTHEST = 1000  # the streamed radius, so the cells looked at are loaded
+    DESPAWN_DISTANCE = 1600
+    CAPS = {False: 8, True: 12}  # passive, hostile
+    CHUNK_CAP = 3
+    DARK = 7  # hostile mobs spawn at this light level or below, day or night
+    CAVE_ROWS = 16  # rows scanned down for a cave floor
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def update(self, world, mobs, player, camera, is_day):
+        self.despawn(world, mobs, player, camera, is_day)
+        for _ in range(self.ATTEMPTS):
+            self.attempt(world, mobs, player.rect.center, is_day)
+
+    def despawn(self, world, mobs, player, camera, is_day):
+        n = mobs.count
+        if n == 0:
+            return
+        center_x = mobs.x[:n] + mobs.width[:n] / 2
+        center_y = mobs.y[:n] + mobs.height[:n] / 2
+        keep = np.hypot(center_x - player.rect.centerx, center_y - player.rect.centery) <= self.DESPAWN_DISTANCE
+        if is_day:
+            # hostile mobs out under the open sky go at dawn, as soon as nobody is looking
+            hidden = ~mobs.touching(camera.camera)
+            for i in np.flatnonzero(keep & hidden & mobs.hostile[mobs.species[:n]]).tolist():
+                grid_x, grid_y = int(center_x[i] // TILE_SIZE), int(center_y[i] // TILE_SIZE)
+                if world.lights.level(SKY, grid_x, grid_y) == MAX_LIGHT:
+                    keep[i] = False
+        if not keep.all():
+            mobs.remove(keep)
+
+    def attempt(self, world, mobs, center, is_day):
+        rng = self.rng
+        grid_x = int(center[0] + rng.uniform(self.NEAREST, self.FARTHEST) * rng.choice((-1, 1))) // TILE_SIZE
+        top = world.surface(grid_x)
+        if top is None:
+            return None
+        if rng.random() < 0.5:
+            floor = top
+        else:
+            floor = self.cave_floor(world, grid_x, rng.randint(top + 1, top + self.FARTHEST // TILE_SIZE))
+            if floor is None:
+                return None
+        if abs(floor * TILE_SIZE - center[1]) > self.FARTHEST or not world.is_loaded(grid_x * TILE_SIZE, floor * TILE_SIZE):
+            return None
+
+        light = max(world.lights.level(SKY, grid_x, floor - 1), world.lights.level(GLOW, grid_x, floor - 1))
+        hostile = light <= self.DARK or not is_day
+        n = mobs.count
+        if np.count_nonzero(mobs.hostile[mobs.species[:n]] == hostile) >= self.CAPS[hostile]:
+            return None
+        in_chunk = ((mobs.x[:n] // CHUNK_PIXELS == grid_x // CHUNK_SIZE) &
+                    (mobs.y[:n] // CHUNK_PIXELS == (floor - 1) // CHUNK_SIZE))
+        if np.count_nonzero(in_chunk) >= self.CHUNK_CAP:
+            return None
+
+        species = rng.choice([species for species in SPECIES if species.hostile == hostile])
+        x, y = grid_x * TILE_SIZE, floor * TILE_SIZE - species.size[1]
+        if world.solid_cells(x, y, *species.size):
+            return None
+        return mobs.spawn(species.name, x, y)
+
+    def cave_floor(self, world, grid_x, grid_y):
+        # the first solid cell with an open one over it, scanning down from grid_y
+        above = BLOCK_SOLID[world.get_tile(grid_x, grid_y - 1)]
+        for row in range(grid_y, grid_y + self.CAVE_ROWS):
+            solid = BLOCK_SOLID[world.get_tile(grid_x, row)]
+            if solid and not above:
+                return row
+            above = solid
+        return None
+
+class Hud:
+    # the hotbar, hearts and labels are composited onto two cached panels that are only redrawn
+    # when what they show changes, so most frames the whole HUD is two blits
+    FPS_STEP = 5  # the counter moves in steps this big instead of flickering every frame
+    COUNT_FONT = (None, 20)
+    LABEL_FONT = ('Arial', 20)
+    HOTBAR_X = (WIDTH - HOTBAR_WIDTH) // 2
+    HOTBAR_Y = HEIGHT - HOTBAR_HEIGHT - HOTBAR_MARGIN
+    HEARTS = (320, 725)
+    BOTTOM = pygame.Rect(HOTBAR_X - 2, HEARTS[1], HOTBAR_WIDTH + 4, HOTBAR_Y + HOTBAR_HEIGHT + 2 - HEARTS[1])
+    TOP = pygame.Rect(10, 10, 400, 45)
+
+    def __init__(self):
+        self.bottom = pygame.Surface(self.BOTTOM.size, pygame.SRCALPHA)
+        self.top = pygame.Surface(self.TOP.size, pygame.SRCALPHA)
+        self.bottom_state = None
+        self.top_state = None
+        self.fonts = {}
+        self.texts = {}
+
+    def text(self, font, string, color):
+        # slot counts and the fps only ever show a handful of strings, each is rendered once
+        key = (font, string, color)
+        surface = self.texts.get(key)
+        if surface is None:
+            if font not in self.fonts:
+                self.fonts[font] = pygame.font.SysFont(*font)
+            surface = self.fonts[font].render(string, True, color)
+            self.texts[key] = surface
+        return surface
+
+    def draw(self, screen, player, fps):
+        # returns the panels that changed, for the dirty-rect update
+        changed = []
+        bottom_state = (tuple((item["type"], item["count"]) for item in player.inventory.values()),
+                        player.selected_slot, self.hearts(player), textures.version)
+        if bottom_state != self.bottom_state:
+            self.bottom_state = bottom_state
+            self.bottom.fill((0, 0, 0, 0))
+            self.draw_hotbar(self.bottom, player)
+            self.draw_health_bar(self.bottom, player)
+            changed.append(self.BOTTOM)
+        fps = int(fps) // self.FPS_STEP * self.FPS_STEP
+        if fps != self.top_state:
+            self.top_state = fps
+            self.top.fill((0, 0, 0, 0))
+            self.top.blit(self.text(self.LABEL_FONT, f"FPS: {fps}", (255, 0, 0)), (0, 0))
+            self.top.blit(self.text(self.LABEL_FONT, "FATALCRAFT, ALPHA VERSION 1.1", WHITE), (0, 20))
+            changed.append(self.TOP)
+        screen.blit(self.bottom, self.BOTTOM)
+        screen.blit(self.top, self.TOP)
+        return changed
+
+    def draw_hotbar(self, panel, player):
+        hotbar_x = self.HOTBAR_X - self.BOTTOM.x
+        hotbar_y = self.HOTBAR_Y - self.BOTTOM.y
+        
+        pygame.draw.rect(panel, (50, 50, 50), 
+                        (hotbar_x - 2, hotbar_y - 2, 
+                         HOTBAR_WIDTH + 4, HOTBAR_HEIGHT + 4))
+        pygame.draw.rect(panel, (150, 150, 150), 
+                        (hotbar_x, hotbar_y, HOTBAR_WIDTH, HOTBAR_HEIGHT))
+        
+        for slot in range(HOTBAR_SLOTS):
+            slot_x = hotbar_x + slot * SLOT_SIZE
+            slot_rect = pygame.Rect(slot_x, hotbar_y, SLOT_SIZE, SLOT_SIZE)
+            
+            pygame.draw.rect(panel, (100, 100, 100), slot_rect, 2)
+            
+            item = player.inventory[slot]
+            if item["type"]:
+                block_type = ITEM_BLOCKS.get(item["type"])
+                if block_type:
+                    icon = textures.get(block_type.texture, (SLOT_SIZE - 10, SLOT_SIZE - 10), block_type.color)
+                    panel.blit(icon, (slot_x + 5, hotbar_y + 5))
+                
+                count_text = self.text(self.COUNT_FONT, str(item["count"]), WHITE)
+                panel.blit(count_text, (slot_x + SLOT_SIZE - 15, hotbar_y + SLOT_SIZE - 20))
+        
+        selection_x = hotbar_x + player.selected_slot * SLOT_SIZE
+        pygame.draw.rect(panel, SELECTED_COLOR, 
+                        (selection_x - 2, hotbar_y - 2, 
+                         SLOT_SIZE + 4, SLOT_SIZE + 4), 2)
+
+    def hearts(self, player):
+        # what the health bar shows, so damage too small to change a heart doesn't redraw it
+        return (int(player.health // 2), player.health % 2 >= 1,
+                int((player.max_health - player.health) // 2))
+
+    def draw_health_bar(self, panel, player):
+        heart_size = player.heart_size
+        padding = 0.2
+
+        start_x = self.HEARTS[0] - self.BOTTOM.x
+        start_y = self.HEARTS[1] - self.BOTTOM.y
+
+        full_hearts, half_hearts, empty_hearts = self.hearts(player)
+        
+        x_offset = 0
+        for _ in range(full_hearts):
+            panel.blit(player.heart_images["full"], (start_x + x_offset, start_y))
+            x_offset += heart_size + padding
+        
+        if half_hearts:
+            panel.blit(player.heart_images["half"], (start_x + x_offset, start_y))
+            x_offset += heart_size + padding
+            empty_hearts -= 1  
+        
+        for _ in range(empty_hearts):
+            panel.blit(player.heart_images["empty"], (start_x + x_offset, start_y))
+            x_offset += heart_size + padding
+
+
+
+class FrameProfiler:
+    # per-phase timings for the last PROFILE_FRAMES frames, kept in a numpy ring buffer;
+    # mark() closes the running phase and starts the next, and is a single check when off
+    PHASES = ("events", "input", "spawning", "mining", "streaming", "physics", "particles", "mobs",
+              "terrain", "sprites", "hud", "present")
+    BAR_COLORS = [(230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48), (145, 30, 180),
+                  (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 212), (0, 128, 128), (220, 190, 255)]
+
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.enabled = False
+        self.index = {name: i for i, name in enumerate(self.PHASES)}
+        self.phases = np.zeros((frames, len(self.PHASES)))
+        self.frame_times = np.zeros(frames)
+        self.frames = 0  # frames recorded, the newest at (frames - 1) % len(frame_times)
+        self.current = np.zeros(len(self.PHASES))
+        self.phase = None
+        self.phase_start = 0
+        self.frame_start = None
+        self.font = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.phase = None
+        self.frame_start = None
+        self.current[:] = 0
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.current[self.phase] += now - self.phase_start
+        self.phase = self.index[phase] if phase else None
+        self.phase_start = now
+
+    def end_frame(self):
+        # the frame time runs from one end_frame to the next, so it includes the clock's wait
+        if not self.enabled:
+            return
+        self.mark(None)
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            slot = self.frames % len(self.frame_times)
+            self.phases[slot] = self.current
+            self.frame_times[slot] = now - self.frame_start
+            self.frames += 1
+        self.current[:] = 0
+        self.frame_start = now
+
+    def recorded(self):
+        count = min(self.frames, len(self.frame_times))
+        return self.phases[:count] * 1000, self.frame_times[:count] * 1000
+
+    def summary(self):
+        phases, frame_times = self.recorded()
+        if not len(frame_times):
+            return None
+        p50, p95, p99 = np.percentile(frame_times, [50, 95, 99])
+        return {
+            "frames": len(frame_times),
+            "frame_ms": {"mean": float(frame_times.mean()), "p50": float(p50), "p95": float(p95),
+                         "p99": float(p99), "max": float(frame_times.max())},
+            "phase_ms": {name: {"mean": float(phases[:, i].mean()), "max": float(phases[:, i].max())}
+                         for i, name in enumerate(self.PHASES)},
+        }
+
+    def dump(self, path, counts):
+        phases, frame_times = self.recorded()
+        # oldest frame first, once the buffer has wrapped that's the slot about to be overwritten
+        start = self.frames % len(self.frame_times) if self.frames >= len(self.frame_times) else 0
+        order = (np.arange(len(frame_times)) + start) % len(frame_times)
+        with open(path, "w") as f:
+            json.dump({
+                "summary": self.summary(),
+                "counts": counts,
+                "phases": list(self.PHASES),
+                "frames": [{"frame_ms": float(frame_times[i]), "phase_ms": phases[i].round(3).tolist()} for i in order],
+            }, f, indent=1)
+        print(f"Profile written to {path}")
+
+    def draw(self, screen, counts):
+        summary = self.summary()
+        if summary is None:
+            return
+        if self.font is None:
+            self.font = pygame.font.SysFont(None, 18)
+        phases, _ = self.recorded()
+        means = phases.mean(axis=0)
+        panel = pygame.Surface((300, 40 + 16 * len(self.PHASES) + 16 * len(counts)), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        frame = summary["frame_ms"]
+        lines = [f"frame {frame['mean']:.1f} ms  p50 {frame['p50']:.1f}  p95 {frame['p95']:.1f}  p99 {frame['p99']:.1f}"]
+        panel.blit(self.font.render(lines[0], True, WHITE), (6, 6))
+        y = 26
+        scale = 180 / max(frame["p99"], 1)
+        for i, name in enumerate(self.PHASES):
+            pygame.draw.rect(panel, self.BAR_COLORS[i], (110, y + 2, max(int(means[i] * scale), 1), 10))
+            panel.blit(self.font.render(f"{name} {means[i]:.2f}", True, WHITE), (6, y))
+            y += 16
+        y += 6
+        for name, value in counts.items():
+            panel.blit(self.font.render(f"{name}: {value}", True, WHITE), (6, y))
+            y += 16
+        screen.blit(panel, (WIDTH - panel.get_width() - 10, 10))
+
+class SilentSound:
+    # stands in for a mixer sound until the game has a mixer, and for good in headless mode
+    def play(self):
+        pass
+
+hurt_sound = SilentSound()
+
+class Inputs:
+    # a snapshot of what the player is doing for one tick; jump, attack and slot changes are
+    # one-shot and only reach the first tick that sees them
+    def __init__(self, left=False, right=False, sprint=False, mine=False, place=False, mouse=(0, 0),
+                 jump=False, attack=False, slot=None, slot_step=0, world_mouse=None):
+        self.left = left
+        self.right = right
+        self.sprint = sprint
+        self.mine = mine
+        self.place = place
+        self.mouse = mouse  # screen position
+        self.jump = jump
+        self.attack = attack
+        self.slot = slot
+        self.slot_step = slot_step
+        self.world_mouse = world_mouse  # filled in by the tick from the camera unless a replay sets it
+
+    def held(self):
+        return Inputs(self.left, self.right, self.sprint, self.mine, self.place, self.mouse)
+
+    def poll(self, events):
+        # the next frame's inputs; one-shots no tick has consumed yet are carried over
+        keys = pygame.key.get_pressed()
+        mouse_buttons = pygame.mouse.get_pressed()
+        inputs = Inputs(keys[pygame.K_LEFT] or keys[pygame.K_a], keys[pygame.K_RIGHT] or keys[pygame.K_d],
+                        keys[pygame.K_LSHIFT], mouse_buttons[0], mouse_buttons[2], pygame.mouse.get_pos(),
+                        self.jump, self.attack, self.slot, self.slot_step)
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_SPACE, pygame.K_UP, pygame.K_w):
+                    inputs.jump = True
+                if pygame.K_1 <= event.key <= pygame.K_9:
+                    inputs.slot = event.key - pygame.K_1
+                elif event.key == pygame.K_LEFTBRACKET:
+                    inputs.slot_step -= 1
+                elif event.key == pygame.K_RIGHTBRACKET:
+                    inputs.slot_step += 1
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                inputs.attack = True
+        return inputs
+
+class InputRecorder:
+    # one fixed-size record per tick, zlib-compressed on save; together with the seed in the
+    # header that is everything needed to play a session back tick for tick
+    BUTTONS = ("left", "right", "sprint", "mine", "place", "jump", "attack")
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.records = bytearray()
+        self.ticks = 0
+
+    def add(self, inputs):
+        flags = 0
+        for bit, name in enumerate(self.BUTTONS):
+            if getattr(inputs, name):
+                flags |= 1 << bit
+        slot = -1 if inputs.slot is None else inputs.slot
+        self.records += REPLAY_TICK.pack(flags, slot, inputs.slot_step, int(inputs.world_mouse[0]), int(inputs.world_mouse[1]))
+        self.ticks += 1
+
+    def save(self, path):
+        header = json.dumps({"seed": self.seed, "ticks": self.ticks, "tick_rate": TICK_RATE}).encode()
+        with open(path, "wb") as f:
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, len(header)))
+            f.write(header)
+            f.write(zlib.compress(bytes(self.records), 9))
+        print(f"Recorded {self.ticks} ticks to {path}")
+
+def load_replay(path):
+    # returns the recording's header and one Inputs per tick
+    with open(path, "rb") as f:
+        magic, version, header_size = REPLAY_HEADER.unpack(f.read(REPLAY_HEADER.size))
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a replay")
+        header = json.loads(f.read(header_size))
+        records = zlib.decompress(f.read())
+    ticks = []
+    for flags, slot, slot_step, mouse_x, mouse_y in REPLAY_TICK.iter_unpack(records):
+        buttons = {name: bool(flags & (1 << bit)) for bit, name in enumerate(InputRecorder.BUTTONS)}
+        ticks.append(Inputs(slot=None if slot < 0 else slot, slot_step=slot_step,
+                            world_mouse=(mouse_x, mouse_y), **buttons))
+    return header, ticks
+
+class Game:
+    # the world, the player, the mobs and the rules that move them; tick() advances one fixed
+    # step and render() draws onto any surface, so none of it needs a window
+    def __init__(self, headless=False, directory=WORLD_DIR, seed=None, deterministic=False, render_scale=1):
+        global hurt_sound
+        self.headless = headless
+        # deterministic games stream chunks synchronously, so the world a tick sees never
+        # depends on how fast the worker pool happened to be
+        self.deterministic = deterministic
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+            textures.headless = True
+        pygame.init()
+        if headless:
+            self.screen = pygame.Surface((WIDTH, HEIGHT))
+        else:
+            mixer.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("FatalCraft")
+            try:
+                hurt_sound = mixer.Sound("sounds/hurt.mp3")
+            except:
+                print("Could not load sounds")
+
+                hurt_sound = mixer.Sound(buffer=bytearray(100))
+        self.hud = Hud()
+
+        self.player = Player()
+        self.mobs = MobSystem(seed=self.seed)
+        self.spawner = MobSpawner(seed=self.seed)
+        self.world = World(directory, self.seed)
+        self.world.load()
+        self.world.stream((self.player.rect.x, self.player.rect.y), 1000, wait=True)
+        self.camera = Camera(WIDTH, HEIGHT, render_scale)
+        self.terrain = TerrainRenderer(self.world)
+        # the world is drawn at render_scale and stretched to the window, the HUD stays sharp on top
+        self.canvas = None
+        if render_scale != 1:
+            self.canvas = pygame.Surface((math.ceil(WIDTH * render_scale), math.ceil(HEIGHT * render_scale)))
+        self.presented = None  # what the window showed last frame, see present()
+        self.tick_count = 0
+        self.is_day = True
+        self.running = True
+        self.dead = False
+        self.profiler = FrameProfiler()
+        self.recorder = None
+
+    def tick(self, inputs):
+        player = self.player
+        world = self.world
+        mobs = self.mobs
+        profiler = self.profiler
+        profiler.mark("input")
+        self.tick_count += 1
+        health = player.health
+        # the mouse is read against where the camera is this tick, not where the last frame drew it
+        self.camera.update(player)
+        if inputs.world_mouse is None:
+            inputs.world_mouse = (inputs.mouse[0] + self.camera.camera.x, inputs.mouse[1] + self.camera.camera.y)
+        if self.recorder is not None:
+            self.recorder.add(inputs)
+
+        if inputs.jump and player.on_ground:
+            player.gravity = player.jump_power
+            player.on_ground = False
+            player.can_jump = False
+        if inputs.slot is not None:
+            player.selected_slot = inputs.slot
+        player.selected_slot = (player.selected_slot + inputs.slot_step) % HOTBAR_SLOTS
+        if inputs.attack:
+            mobs.hit_at(inputs.world_mouse, player.attack, player)
+
+        move_x = 0
+        if inputs.left:
+            move_x -= player.speed
+            player.facing_right = False
+        if inputs.right:
+            move_x += player.speed
+            player.facing_right = True
+        if inputs.left:
+            player.sprinting = inputs.sprint
+            player.speed = 6.612 if player.sprinting else 3.317
+            move_x -= player.speed
+            player.facing_right = False
+        
+        if inputs.right:
+            player.sprinting = inputs.sprint
+            player.speed = 6.612 if player.sprinting else 3.317
+            move_x += player.speed
+            player.facing_right = True
+
+
+        # void damage
+        if player.world_pos[1] > HEIGHT * 4:
+            player.damage_frames += 1
+            if player.damage_frames >= player.damage_delay:
+                player.health -= 2
+                player.damage_frames = 0
+                hurt_sound.play()
+        else:
+            player.damage_frames = 0 
+    
+        if player.health < 1:
+            self.dead = True
+            self.running = False
+        # day and night follow simulated time, so a slow frame rate doesn't stretch them
+        current_time = self.tick_count * TICK_MS
+        self.is_day = current_time % 120000 < 60000
+
+        profiler.mark("spawning")
+        self.spawner.update(world, mobs, player, self.camera, self.is_day)
+
+        profiler.mark("mining")
+        self.use_blocks(inputs)
+
+        profiler.mark("streaming")
+        world.stream((player.rect.x, player.rect.y), 1000, wait=self.deterministic)
+        profiler.mark("physics")
+        player.update(world, move_x)
+        profiler.mark("particles")
+        world.update_particles()
+        profiler.mark("mobs")
+        mobs.update(world, player)
+        # whatever hurt the player this tick, the sprite shows it for a moment
+        if player.health < health:
+            player.hurt_ticks = HURT_TICKS
+        elif player.hurt_ticks:
+            player.hurt_ticks -= 1
+        profiler.mark(None)
+
+    def use_blocks(self, inputs):
+        player = self.player
+        world = self.world
+
+        # mining/placing blocks: the cell under the cursor is looked up directly. a ray from the
+        # player to the cursor decides whether a block can be mined or sits behind another one;
+        # it ends on the face the cursor points at, so the top of the ground stays reachable
+        grid_x = int(inputs.world_mouse[0] // TILE_SIZE)
+        grid_y = int(inputs.world_mouse[1] // TILE_SIZE)
+        cell_center = (grid_x * TILE_SIZE + TILE_SIZE // 2, grid_y * TILE_SIZE + TILE_SIZE // 2)
+
+        if inputs.mine:  
+            in_reach = math.hypot(cell_center[0] - player.rect.centerx,
+                                  cell_center[1] - player.rect.centery) <= player.max_mine_distance
+            hit = world.raycast(player.rect.center, inputs.world_mouse) if in_reach else None
+            block = world.get_block(grid_x, grid_y) if hit == (grid_x, grid_y) else None
+            if block is not None and block.type.breakable:
+                if block != player.mining_block:
+                    player.mining_block = block
+
+                # damage lives in the world's side-table, so a half-mined block stays half-mined
+                destroyed = world.damage_block(grid_x, grid_y, player.mining_speed)
+                player.mining_progress = block.max_health - world.get_health(grid_x, grid_y)
+
+                if destroyed:
+                    item_type = block.type.drop
+                    world.add_particles(block.rect.centerx, block.rect.centery, block.type.particle_color, 15)
+                    
+                    added = False
+                    for slot in range(HOTBAR_SLOTS):
+                        if player.inventory[slot]["type"] == item_type:
+                            player.inventory[slot]["count"] += 1
+                            added = True
+                            break
+                    
+                    if not added:
+                        for slot in range(HOTBAR_SLOTS):
+                            if player.inventory[slot]["type"] is None:
+                                player.inventory[slot]["type"] = item_type
+                                player.inventory[slot]["count"] = 1
+                                added = True
+                                break
+                    
+                    player.mining_block = None
+                    player.mining_progress = 0
+            else:
+                # nothing there, or nothing that can be mined: no progress bar either
+                player.mining_block = None
+                player.mining_progress = 0
+        if inputs.place:
+            selected_item = player.inventory[player.selected_slot]
+            # an empty cell with a neighbour (or the ground line) to stick to
+            if selected_item["type"] and selected_item["count"] > 0:
+                has_support = any(world.get_tile(grid_x + dx, grid_y + dy) != AIR
+                                  for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)])
+                cell_rect = pygame.Rect(grid_x * TILE_SIZE, grid_y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+
+                if (not player.rect.colliderect(cell_rect) and world.get_tile(grid_x, grid_y) == AIR and
+                    (has_support or grid_y * TILE_SIZE >= HEIGHT - 50)):
+                    world.set_tile(grid_x, grid_y, ITEM_BLOCKS[selected_item["type"]].id)
+
+                    selected_item["count"] -= 1
+                    if selected_item["count"] <= 0:
+                        selected_item["type"] = None
+
+    def render(self, screen, alpha=1.0, fps=0):
+        # draw everything part of the way between the last two ticks; returns the window areas
+        # that can differ from the previous frame when the camera stays put
+        player = self.player
+        camera = self.camera
+        profiler = self.profiler
+        profiler.mark("terrain")
+        camera.update(player, alpha)
+        player_x, player_y = player.render_pos(alpha)
+        canvas = self.canvas or screen
+
+        canvas.fill(DAY_COLOR if self.is_day else NIGHT_COLOR)
+
+        dirty = self.terrain.draw(canvas, camera)
+
+        profiler.mark("sprites")
+        dirty += self.world.draw_particles(canvas, camera)
+
+        dirty.append(canvas.blit(player.sprite(camera.scale), camera.to_screen(player_x, player_y)))
+        dirty += self.mobs.draw(canvas, camera, alpha)
+    
+        if player.mining_block:
+            block_x, block_y = camera.to_screen(player.mining_block.rect.x, player.mining_block.rect.y - 10)
+            progress_pct = min(player.mining_progress / BLOCK_HEALTH, 1.0)
+            dirty.append(pygame.draw.rect(canvas, (255, 255, 255), 
+                                          (block_x, block_y, 
+                                           player.mining_block.rect.width * camera.scale * progress_pct,
+                                           max(1, round(5 * camera.scale)))))
+
+        if canvas is not screen:
+            pygame.transform.scale(canvas, screen.get_size(), screen)
+            scale = camera.scale
+            dirty = [pygame.Rect(math.floor(rect.x / scale), math.floor(rect.y / scale),
+                                 math.ceil(rect.width / scale) + 1, math.ceil(rect.height / scale) + 1)
+                     for rect in dirty]
+
+        profiler.mark("hud")
+        dirty += self.hud.draw(screen, player, fps)
+
+        if profiler.enabled:
+            profiler.draw(screen, self.counts())
+        profiler.mark(None)
+        return dirty
+
+    def present(self, dirty):
+        # with a still camera only what moved needs to reach the window, so pass just those
+        # rectangles (this frame's and last frame's, to clear where things were) to display.update;
+        # anything that changes the whole view falls back to a full flip
+        view = (self.camera.camera.topleft, self.is_day, self.profiler.enabled)
+        if self.presented is None or self.presented[0] != view:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.presented[1] + dirty)
+        self.presented = (view, dirty)
+
+    def counts(self):
+        return {"mobs": int(self.mobs.count), "particles": len(self.world.particles),
+                "chunks": len(self.world.chunks), "chunks queued": len(self.world.pending)}
+
+    def run(self):
+        clock = pygame.time.Clock()
+        accumulator = 0.0
+        inputs = Inputs()
+        profiler = self.profiler
+        while self.running:
+            profiler.mark("events")
+            events = pygame.event.get()
+            for event in events:
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    self.world.save()
+                    self.running = False
+                # F3 shows the profiler, F4 writes what it has recorded to a file
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.toggle()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and profiler.enabled:
+                    profiler.dump(f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json", self.counts())
+            inputs = inputs.poll(events)
+            profiler.mark(None)
+
+            accumulator += min(clock.tick(MAX_FPS) / 1000, MAX_FRAME_TIME)
+            while self.running and accumulator >= TICK_SECONDS:
+                accumulator -= TICK_SECONDS
+                self.tick(inputs)
+                inputs = inputs.held()
+            # finished chunks are handed over once per frame, however many ticks it caught up on
+            profiler.mark("streaming")
+            self.world.drain()
+            profiler.mark(None)
+
+            if self.dead:
+                self.screen.fill(BLACK)
+                font = pygame.font.SysFont(None, 72)
+                text = font.render("GET WRECKED LOL", True, (255, 0, 0))
+                self.screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
+                pygame.display.flip()
+                time.sleep(2)
+                break
+            dirty = self.render(self.screen, accumulator / TICK_SECONDS, clock.get_fps())
+            profiler.mark("present")
+            self.present(dirty)
+            profiler.end_frame()
+
+    def state_hash(self):
+        # a digest of everything the simulation decides, to check two runs ended up in the same place
+        digest = hashlib.sha256()
+        player = self.player
+        digest.update(json.dumps([self.tick_count, [round(v, 6) for v in player.world_pos], round(player.health, 6),
+                                  player.selected_slot, [player.inventory[i] for i in range(HOTBAR_SLOTS)]]).encode())
+        n = self.mobs.count
+        for field in ("species", "x", "y", "health"):
+            digest.update(getattr(self.mobs, field)[:n].tobytes())
+        for key in sorted(self.world.chunks):
+            digest.update(struct.pack("<ii", *key))
+            digest.update(self.world.chunks[key].tiles.tobytes())
+        return digest.hexdigest()
+
+    def replay(self, ticks):
+        for inputs in ticks:
+            if not self.running:
+                break
+            self.tick(inputs)
+
+    def run_headless(self, ticks):
+        # as fast as the simulation goes, with nobody at the controls
+        inputs = Inputs()
+        for _ in range(ticks):
+            if not self.running:
+                break
+            self.tick(inputs)
+            self.world.drain()
+        self.world.save()
+
+
+def option(name, default=None):
+    # the value after a command line flag, if there is one
+    if name in sys.argv and sys.argv.index(name) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+if __name__ == "__main__":
+    if "--replay" in sys.argv:
+        # replays always run on a fresh world generated from the recorded seed
+        header, ticks = load_replay(option("--replay"))
+        game = Game(headless=True, directory=tempfile.mkdtemp(prefix="fatalcraft-replay-"),
+                    seed=header["seed"], deterministic=True)
+        start = time.perf_counter()
+        game.replay(ticks)
+        elapsed = time.perf_counter() - start
+        print(f"{game.tick_count} ticks in {elapsed:.2f}s ({game.tick_count / elapsed:.0f} ticks/s)")
+        print(f"state hash {game.state_hash()}")
+        game.world.close()
+        shutil.rmtree(game.world.storage.directory, ignore_errors=True)
+    elif "--record" in sys.argv:
+        # recordings start from a fresh world too, so a replay can rebuild exactly what was played on
+        seed = int(option("--seed", random.randrange(2 ** 32)))
+        game = Game(directory=tempfile.mkdtemp(prefix="fatalcraft-record-"), seed=seed, deterministic=True)
+        game.recorder = InputRecorder(seed)
+        game.run()
+        game.recorder.save(option("--record"))
+        print(f"state hash {game.state_hash()}")
+        game.world.close()
+        shutil.rmtree(game.world.storage.directory, ignore_errors=True)
+    elif "--headless" in sys.argv:
+        # a throwaway world unless --world names one, so a test run never writes into the real save
+        ticks = int(option("--headless", 3600))
+        directory = option("--world")
+        game = Game(headless=True, directory=directory or tempfile.mkdtemp(prefix="fatalcraft-headless-"))
+        start = time.perf_counter()
+        game.run_headless(ticks)
+        elapsed = time.perf_counter() - start
+        print(f"{game.tick_count} ticks in {elapsed:.2f}s ({game.tick_count / elapsed:.0f} ticks/s)")
+        game.world.close()
+        if directory is None:
+            shutil.rmtree(game.world.storage.directory, ignore_errors=True)
+    else:
+        # --scale 0.5 draws the world at half resolution for slow machines
+        game = Game(render_scale=float(option("--scale", 1)))
+        game.run()
+    sys.exit(1)